@@ -10,12 +10,13 @@ import os
 from datetime import datetime
 import h5py
 import numpy as np
-import base64
 import gzip
 
 class APIHandler(BaseHTTPRequestHandler):
     # Cache for logit lens data
     _logit_lens_cache = None
+    # Built logit lens responses by (layer, projection, polarity)
+    _logit_lens_entries = {}
     
     @classmethod
     def load_logit_lens_data(cls):
@@ -33,6 +34,38 @@ class APIHandler(BaseHTTPRequestHandler):
         
         return cls._logit_lens_cache
     
+    @classmethod
+    def logit_lens_entry(cls, layer_idx, proj_type, polarity):
+        """Logit lens response for one layer/projection/polarity, or None if there is no data"""
+        cache_key = (layer_idx, proj_type, polarity)
+        if cache_key in cls._logit_lens_entries:
+            return cls._logit_lens_entries[cache_key]
+        
+        layer_data = cls.load_logit_lens_data().get('layers', {}).get(layer_idx)
+        if layer_data is None or proj_type not in layer_data:
+            return None
+        
+        proj_data = layer_data[proj_type]
+        tokens_data = proj_data.get('top_positive' if polarity == 'positive' else 'top_negative', [])
+        values = [entry['value'] for entry in tokens_data]
+        # Bar widths as whole percentages of the largest |value|, so the client does no scaling
+        max_abs = max((abs(value) for value in values), default=0)
+        bar_pct = [round(abs(value) / max_abs * 100) if max_abs > 0 else 0 for value in values]
+        
+        # Parallel token/value arrays parse faster on the client than a list of objects
+        response = {
+            'layer': layer_idx,
+            'projection': proj_type,
+            'polarity': polarity,
+            'analysis_type': proj_data.get('analysis_type', 'unknown'),
+            'tokens': [entry['token'] for entry in tokens_data],
+            'values': values,
+            'barPct': bar_pct,
+            'stats': proj_data.get('stats', {})
+        }
+        cls._logit_lens_entries[cache_key] = response
+        return response
+    
     def do_OPTIONS(self):
         self.send_response(200)
         self.send_header('Access-Control-Allow-Origin', '*')
@@ -109,23 +142,20 @@ class APIHandler(BaseHTTPRequestHandler):
                         activations = f['activations'][:]
                         shape = list(activations.shape)
                     
-                    # Convert to float16 and compress
+                    # Convert to float16 and compress; sent as raw bytes with the
+                    # shape in a header rather than base64 inside JSON
                     activations_f16 = activations.astype(np.float16)
                     compressed = gzip.compress(activations_f16.tobytes(), compresslevel=1)
-                    encoded = base64.b64encode(compressed).decode('ascii')
                     
                     self.send_response(200)
-                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Type', 'application/octet-stream')
+                    self.send_header('Content-Length', str(len(compressed)))
+                    self.send_header('X-Shape', ','.join(str(dim) for dim in shape))
+                    self.send_header('X-Dtype', 'float16')
                     self.send_header('Access-Control-Allow-Origin', '*')
+                    self.send_header('Access-Control-Expose-Headers', 'X-Shape, X-Dtype')
                     self.end_headers()
-                    
-                    response = {
-                        'rollout_idx': rollout_idx,
-                        'shape': shape,
-                        'dtype': 'float16',
-                        'data': encoded
-                    }
-                    self.wfile.write(json.dumps(response).encode())
+                    self.wfile.write(compressed)
                 else:
                     self.send_error(404, f"Activations for rollout {rollout_idx} not found")
             except Exception as e:
@@ -139,41 +169,20 @@ class APIHandler(BaseHTTPRequestHandler):
                 proj_type = parts[-2]
                 polarity = parts[-1]
                 
-                # Load logit lens data
-                logit_lens_data = self.load_logit_lens_data()
+                if polarity not in ('positive', 'negative'):
+                    self.send_error(400, "Invalid polarity. Use 'positive' or 'negative'")
+                    return
                 
-                if 'layers' in logit_lens_data and layer_idx in logit_lens_data['layers']:
-                    layer_data = logit_lens_data['layers'][layer_idx]
-                    if proj_type in layer_data:
-                        proj_data = layer_data[proj_type]
-                        
-                        # Get the requested data
-                        if polarity == 'positive':
-                            tokens_data = proj_data.get('top_positive', [])
-                        elif polarity == 'negative':
-                            tokens_data = proj_data.get('top_negative', [])
-                        else:
-                            self.send_error(400, "Invalid polarity. Use 'positive' or 'negative'")
-                            return
-                        
-                        response = {
-                            'layer': layer_idx,
-                            'projection': proj_type,
-                            'polarity': polarity,
-                            'analysis_type': proj_data.get('analysis_type', 'unknown'),
-                            'tokens': tokens_data,
-                            'stats': proj_data.get('stats', {})
-                        }
-                        
-                        self.send_response(200)
-                        self.send_header('Content-Type', 'application/json')
-                        self.send_header('Access-Control-Allow-Origin', '*')
-                        self.end_headers()
-                        self.wfile.write(json.dumps(response).encode())
-                    else:
-                        self.send_error(404, f"Projection {proj_type} not found for layer {layer_idx}")
-                else:
-                    self.send_error(404, f"Layer {layer_idx} not found in logit lens data")
+                response = self.logit_lens_entry(layer_idx, proj_type, polarity)
+                if response is None:
+                    self.send_error(404, f"No logit lens data for layer {layer_idx} {proj_type}")
+                    return
+                
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Access-Control-Allow-Origin', '*')
+                self.end_headers()
+                self.wfile.write(json.dumps(response).encode())
             except Exception as e:
                 print(f"Error serving logit lens: {e}")
                 self.send_error(500, str(e))
@@ -1868,14 +1868,9 @@ def generate_dashboard_html(data_path, output_path):
                     throw new Error('Failed to load activations');
                 }}
                 
-                const data = await response.json();
-                
-                // Decode base64
-                const binaryString = atob(data.data);
-                const bytes = new Uint8Array(binaryString.length);
-                for (let i = 0; i < binaryString.length; i++) {{
-                    bytes[i] = binaryString.charCodeAt(i);
-                }}
+                // Gzipped float16 bytes, with the array shape in the X-Shape header
+                const shape = response.headers.get('X-Shape').split(',').map(Number);
+                const bytes = new Uint8Array(await response.arrayBuffer());
                 
                 // Decompress using pako (we'll need to include this library)
                 const decompressed = pako.inflate(bytes);
@@ -1910,7 +1905,7 @@ def generate_dashboard_html(data_path, output_path):
                 // Reshape to [num_tokens, num_layers, 3]
                 const activations = {{
                     data: floatArray,
-                    shape: data.shape,
+                    shape: shape,
                     rolloutIdx: rolloutIdx
                 }};
                 
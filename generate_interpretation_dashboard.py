@@ -7,40 +7,177 @@ Shows a single feature with no layer/projection information to reduce bias.
 import json
 import os
 import argparse
-import html as html_lib
+import base64
+import itertools
+import math
+import mmap
+import re
+import struct
 from datetime import datetime
 import random
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-def generate_token_html(tokens, activations, target_idx, context_window=10):
-    """Generate HTML for token context visualization"""
-    context_start = max(0, target_idx - context_window)
-    context_end = min(len(tokens), target_idx + context_window + 1)
+
+PROJ_TYPES = ('gate_proj', 'up_proj', 'down_proj')
+POLARITY_KEYS = (('positive', 'topPositive'), ('negative', 'topNegative'))
+
+# Token highlight colors for the generated palette classes
+POSITIVE_RGB = '255, 0, 0'
+NEGATIVE_RGB = '0, 0, 255'
+
+# Token and heatmap background palette: COLOR_BUCKETS alpha steps from 0 to MAX_BG_ALPHA,
+# emitted as .bg-pos-N / .bg-neg-N classes so highlighted spans share a style
+COLOR_BUCKETS = 16
+MAX_BG_ALPHA = 0.9
+
+# Example fields read by the client-side renderer; everything else is dropped from the payload.
+# context_activations is shipped separately as packed float16 (see pack_activations).
+EXAMPLE_FIELDS = ('rollout_idx', 'token_idx', 'activation', 'context', 'target_position')
+
+# Largest finite float16 magnitude; struct refuses to pack anything beyond it
+FLOAT16_MAX = 65504.0
+
+# Service worker written next to the dashboard. Rollout contexts never change for a
+# dataset, so they are served cache-first; interpretations are served from cache and
+# revalidated in the background, with the fresh copy posted back to the page.
+# @@CACHE_VERSION@@ is the generation time (shared with the page's IndexedDB cache), so a
+# regenerated dashboard starts a new cache.
+SERVICE_WORKER_FILENAME = 'sw.js'
+SERVICE_WORKER_JS = """const CACHE_NAME = 'lora-dashboard-@@CACHE_VERSION@@';
+// Only fetched by browsers without DecompressionStream, so cached on first use
+const STATIC_URLS = ['https://cdnjs.cloudflare.com/ajax/libs/pako/2.1.0/pako.min.js'];
+
+self.addEventListener('install', () => self.skipWaiting());
+
+self.addEventListener('activate', (event) => {
+    event.waitUntil(
+        caches.keys()
+            .then(keys => Promise.all(keys.filter(key => key !== CACHE_NAME).map(key => caches.delete(key))))
+            .then(() => self.clients.claim())
+    );
+});
+
+async function cacheFirst(request) {
+    const cache = await caches.open(CACHE_NAME);
+    const cached = await cache.match(request);
+    if (cached) return cached;
     
-    html_parts = []
-    for i in range(context_start, context_end):
-        token = tokens[i]
-        activation = activations[i]
-        
-        # Calculate color intensity
-        intensity = min(abs(activation) * 0.1, 0.7)
-        if activation > 0:
-            bg_color = f"rgba(255, 0, 0, {intensity})"
-        else:
-            bg_color = f"rgba(0, 0, 255, {intensity})"
-        
-        # Escape token and replace newlines, preserve all spaces
-        token_display = html_lib.escape(token).replace('\n', '\\n').replace(' ', '&nbsp;')
-        
-        # Style for target token
-        if i == target_idx:
-            style = f'style="background-color: {bg_color}; border: 2px solid red; font-weight: bold; padding: 2px 1px; border-radius: 2px; position: relative; display: inline-block;"'
-        else:
-            style = f'style="background-color: {bg_color}; padding: 2px 1px; border-radius: 2px; position: relative; display: inline-block;"'
-        
-        html_parts.append(f'<span class="token-with-tooltip" {style}>{token_display}<span class="token-tooltip">{activation:.3f}</span></span>')
+    const response = await fetch(request);
+    if (response.ok) {
+        cache.put(request, response.clone());
+    }
+    return response;
+}
+
+async function staleWhileRevalidate(event) {
+    const cache = await caches.open(CACHE_NAME);
+    const cached = await cache.match(event.request);
+    const update = fetch(event.request).then(async (response) => {
+        if (response.ok) {
+            await cache.put(event.request, response.clone());
+            if (cached) {
+                // The page already has the cached copy; hand it the fresh one
+                const [oldText, newText] = await Promise.all([cached.text(), response.clone().text()]);
+                if (oldText !== newText) {
+                    const client = await self.clients.get(event.clientId);
+                    if (client) {
+                        client.postMessage({ type: 'interpretations-updated', data: JSON.parse(newText) });
+                    }
+                }
+            }
+        }
+        return response;
+    });
     
-    return ''.join(html_parts)
+    if (cached) {
+        event.waitUntil(update.catch(() => {}));
+        return cached.clone();
+    }
+    return update;
+}
+
+self.addEventListener('fetch', (event) => {
+    const request = event.request;
+    const url = new URL(request.url);
+    
+    if (url.pathname === '/api/interpretations') {
+        if (request.method === 'GET') {
+            event.respondWith(staleWhileRevalidate(event));
+        } else {
+            // A save changes interpretations; drop the cached copy once it lands
+            event.respondWith(fetch(request).then(async (response) => {
+                if (response.ok) {
+                    const cache = await caches.open(CACHE_NAME);
+                    await cache.delete(url.origin + '/api/interpretations');
+                }
+                return response;
+            }));
+        }
+    } else if (request.method === 'GET' &&
+               (url.pathname.startsWith('/api/rollout_context/') || STATIC_URLS.includes(request.url))) {
+        event.respondWith(cacheFirst(request));
+    }
+});
+"""
+
+
+def palette_css():
+    """CSS rules for the quantized positive/negative background palette"""
+    rules = []
+    for polarity, rgb in (('pos', POSITIVE_RGB), ('neg', NEGATIVE_RGB)):
+        for bucket in range(COLOR_BUCKETS):
+            alpha = bucket / (COLOR_BUCKETS - 1) * MAX_BG_ALPHA
+            rules.append(f'        .bg-{polarity}-{bucket} {{ background-color: rgba({rgb}, {alpha:.3f}); }}')
+    return '\n'.join(rules)
+
+
+def json_loads(raw):
+    """Parse JSON from a bytes-like buffer, using orjson when it is installed
+    
+    orjson rejects NaN and Infinity, which json.dump writes for non-finite floats
+    (the backend's min/max stats of empty features), so those files go through json.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(bytes(raw))
+
+
+def load_json_file(path):
+    """Parse a JSON file directly from a read-only memory map of it"""
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        with memoryview(mm) as view:
+            return json_loads(view)
+
+
+def json_dumps(obj, finite=True):
+    """Serialize to a compact JSON string, using orjson when it is installed
+    
+    orjson writes NaN and Infinity as null; pass finite=False when obj may hold
+    them, so json writes NaN/Infinity as before (both are valid in embedded JS).
+    """
+    if orjson is not None and finite:
+        return orjson.dumps(obj).decode('utf-8')
+    return json.dumps(obj, separators=(',', ':'))
+
+
+def pack_activations(activations):
+    """Encode activations as base64 little-endian float16 for the embedded payload"""
+    clamped = [min(max(a, -FLOAT16_MAX), FLOAT16_MAX) for a in activations]
+    return base64.b64encode(struct.pack(f'<{len(clamped)}e', *clamped)).decode('ascii')
+
+
+def slim_example(example):
+    """Keep only the raw tokens/activations the browser needs to render an example"""
+    slim = {field: example[field] for field in EXAMPLE_FIELDS}
+    slim['context_activations_f16'] = pack_activations(example['context_activations'])
+    return slim
 
 
 def generate_dashboard_html(data_path, output_path):
@@ -48,43 +185,34 @@ def generate_dashboard_html(data_path, output_path):
     
     # Load the activation data
     print(f"Loading data from {data_path}...")
-    with open(data_path, 'r') as f:
-        data = json.load(f)
+    data = load_json_file(data_path)
     
     metadata = data['metadata']
     layers = data['layers']
     
-    # Build list of all features
-    all_features = []
-    for layer_data in layers:
-        layer_idx = layer_data['layerIdx']
-        for proj_type in ['gate_proj', 'up_proj', 'down_proj']:
-            if proj_type in layer_data:
-                # Add positive feature (one per projection type)
-                feature_key = f'layer_{layer_idx}_{proj_type}_positive'
-                all_features.append({
-                    'key': feature_key,
-                    'layer': layer_idx,
-                    'projection': proj_type,
-                    'polarity': 'positive',
-                    'examples': layer_data[proj_type]['topPositive']
-                })
-                
-                # Add negative feature (one per projection type)
-                feature_key = f'layer_{layer_idx}_{proj_type}_negative'
-                all_features.append({
-                    'key': feature_key,
-                    'layer': layer_idx,
-                    'projection': proj_type,
-                    'polarity': 'negative',
-                    'examples': layer_data[proj_type]['topNegative']
-                })
+    # Build list of all features (one positive and one negative per projection type)
+    all_features = [
+        {
+            'key': f"layer_{layer_data['layerIdx']}_{proj_type}_{polarity}",
+            'layer': layer_data['layerIdx'],
+            'projection': proj_type,
+            'polarity': polarity,
+            'examples': [slim_example(example) for example in layer_data[proj_type][examples_key]]
+        }
+        for layer_data, proj_type, (polarity, examples_key)
+        in itertools.product(layers, PROJ_TYPES, POLARITY_KEYS)
+        if proj_type in layer_data
+    ]
+    
+    # Example activations are the only floats in the payload
+    finite = all(math.isfinite(example['activation']) for feature in all_features for example in feature['examples'])
     
     # Count total features
     total_features = len(all_features)
     
-    # Build HTML
-    html_content = f"""<!DOCTYPE html>
+    # Page template as a plain string: no f-string brace escaping, and the large
+    # dynamic values are streamed into the output at the @@PLACEHOLDER@@ markers
+    html_template = """<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -93,15 +221,14 @@ def generate_dashboard_html(data_path, output_path):
     <meta http-equiv="Pragma" content="no-cache">
     <meta http-equiv="Expires" content="0">
     <title>LoRA Feature Interpretation</title>
-    <script src="https://cdnjs.cloudflare.com/ajax/libs/pako/2.1.0/pako.min.js"></script>
     <style>
-        * {{
+        * {
             margin: 0;
             padding: 0;
             box-sizing: border-box;
-        }}
+        }
         
-        body {{
+        body {
             font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
             background-color: #f5f5f5;
             color: #333;
@@ -109,69 +236,69 @@ def generate_dashboard_html(data_path, output_path):
             padding: 0;
             margin: 0;
             overflow: hidden;
-        }}
+        }
         
-        .main-layout {{
+        .main-layout {
             display: flex;
             height: 100vh;
             width: 100vw;
             padding-bottom: 80px; /* Space for control bar */
             box-sizing: border-box;
-        }}
+        }
         
-        .left-panel {{
+        .left-panel {
             flex: 0 0 40%;
             padding: 20px;
             overflow-y: auto;
             padding-bottom: 20px; /* Normal bottom padding */
-        }}
+        }
         
-        .right-panel {{
+        .right-panel {
             flex: 0 0 60%;
             background: white;
             border-left: 1px solid #ddd;
             position: relative;
             display: none; /* Hidden initially, will be changed to flex when shown */
             flex-direction: column;
-        }}
+        }
         
-        .context-wrapper {{
+        .context-wrapper {
             position: relative;
             flex: 1;
             display: flex;
             overflow: hidden;
-        }}
+        }
         
-        .container {{
+        .container {
             max-width: 100%;
             margin: 0 auto;
-        }}
+        }
         
         /* Progress section */
-        .progress-section {{
+        .progress-section {
             background: white;
             padding: 10px 15px;
             border-radius: 6px;
             box-shadow: 0 2px 4px rgba(0,0,0,0.1);
             margin-bottom: 15px;
-        }}
+        }
         
-        .progress-title {{
+        .progress-title {
             font-size: 0.9em;
             font-weight: bold;
             margin-bottom: 6px;
             color: #2c3e50;
-        }}
+        }
         
-        .progress-bar-container {{
+        .progress-bar-container {
             background: #e0e0e0;
             height: 20px;
             border-radius: 10px;
             overflow: hidden;
             position: relative;
-        }}
+        }
         
-        .progress-bar {{
+        .progress-bar {
             height: 100%;
             background: linear-gradient(to right, #3498db, #2ecc71);
             transition: width 0.3s ease;
@@ -180,48 +307,48 @@ def generate_dashboard_html(data_path, output_path):
             justify-content: center;
             color: white;
             font-weight: bold;
-        }}
+        }
         
-        .progress-stats {{
+        .progress-stats {
             margin-top: 10px;
             display: flex;
             justify-content: space-between;
             font-size: 0.9em;
             color: #666;
-        }}
+        }
         
         /* Feature display */
-        .feature-section {{
+        .feature-section {
             background: white;
             padding: 30px;
             border-radius: 8px;
             box-shadow: 0 2px 4px rgba(0,0,0,0.1);
             margin-bottom: 20px;
-        }}
+        }
         
-        .feature-header {{
+        .feature-header {
             text-align: center;
             margin-bottom: 30px;
-        }}
+        }
         
-        .feature-title {{
+        .feature-title {
             font-size: 1.8em;
             font-weight: bold;
             color: #2c3e50;
             margin-bottom: 10px;
-        }}
+        }
         
-        .feature-subtitle {{
+        .feature-subtitle {
             color: #666;
             font-size: 1.1em;
-        }}
+        }
         
         /* Examples */
-        .examples-container {{
+        .examples-container {
             margin-bottom: 30px;
-        }}
+        }
         
-        .example-item {{
+        .example-item {
             background: #f8f9fa;
             padding: 15px;
             border-radius: 6px;
@@ -232,28 +359,32 @@ def generate_dashboard_html(data_path, output_path):
             overflow-x: auto;
             cursor: pointer;
             transition: all 0.2s;
-        }}
+        }
         
-        .example-item:hover {{
+        .example-item:hover {
             background: #e9ecef;
             box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        }}
+        }
         
-        .example-item.selected {{
+        .example-item.selected {
             background: #d4edda;
             border: 2px solid #28a745;
-        }}
+        }
+        
+        .example-tokens:empty {
+            min-height: 1.8em; /* Placeholder height until the example is rendered */
+        }
         
-        .example-info {{
+        .example-info {
             font-size: 0.85em;
             color: #666;
             margin-bottom: 8px;
             font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-        }}
+        }
         
         
         /* Control section */
-        .control-section {{
+        .control-section {
             position: fixed;
             bottom: 0;
             left: 0;
@@ -268,10 +399,10 @@ def generate_dashboard_html(data_path, output_path):
             gap: 30px;
             z-index: 1000;
             box-sizing: border-box; /* Include padding in height */
-        }}
+        }
         
         /* Port configuration */
-        .port-config {{
+        .port-config {
             position: absolute;
             top: 10px;
             right: 20px;
@@ -282,28 +413,28 @@ def generate_dashboard_html(data_path, output_path):
             padding: 8px 15px;
             border-radius: 6px;
             box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        }}
+        }
         
-        .port-label {{
+        .port-label {
             font-size: 0.9em;
             color: #666;
-        }}
+        }
         
-        .port-input {{
+        .port-input {
             width: 80px;
             padding: 6px 10px;
             border: 1px solid #ddd;
             border-radius: 4px;
             font-size: 0.9em;
-        }}
+        }
         
-        .port-input:focus {{
+        .port-input:focus {
             outline: none;
             border-color: #3498db;
             box-shadow: 0 0 0 2px rgba(52, 152, 219, 0.2);
-        }}
+        }
         
-        .port-save-btn {{
+        .port-save-btn {
             padding: 6px 12px;
             background: #3498db;
             color: white;
@@ -312,20 +443,20 @@ def generate_dashboard_html(data_path, output_path):
             cursor: pointer;
             font-size: 0.9em;
             transition: all 0.2s;
-        }}
+        }
         
-        .port-save-btn:hover {{
+        .port-save-btn:hover {
             background: #2980b9;
-        }}
+        }
         
-        .interpretation-mini {{
+        .interpretation-mini {
             display: flex;
             align-items: center;
             gap: 15px;
             flex: 0 1 600px;
-        }}
+        }
         
-        .interpretation-mini-textarea {{
+        .interpretation-mini-textarea {
             flex: 1;
             padding: 10px;
             border: 1px solid #ddd;
@@ -335,26 +466,26 @@ def generate_dashboard_html(data_path, output_path):
             resize: none;
             height: 50px;
             background: white;
-        }}
+        }
         
-        .interpretation-mini-textarea:focus {{
+        .interpretation-mini-textarea:focus {
             outline: none;
             border-color: #3498db;
             box-shadow: 0 0 0 2px rgba(52, 152, 219, 0.2);
-        }}
+        }
         
-        .star-container-mini {{
+        .star-container-mini {
             display: flex;
             align-items: center;
             gap: 5px;
-        }}
+        }
         
-        .button-group {{
+        .button-group {
             display: flex;
             gap: 15px;
-        }}
+        }
         
-        .control-button {{
+        .control-button {
             padding: 12px 30px;
             font-size: 1.1em;
             font-weight: bold;
@@ -362,56 +493,62 @@ def generate_dashboard_html(data_path, output_path):
             border-radius: 6px;
             cursor: pointer;
             transition: all 0.2s;
-        }}
+        }
         
-        .next-button {{
+        .next-button {
             background: #2ecc71;
             color: white;
-        }}
+        }
         
-        .next-button:hover {{
+        .next-button:hover {
             background: #27ae60;
             transform: translateY(-1px);
             box-shadow: 0 4px 8px rgba(0,0,0,0.2);
-        }}
+        }
         
-        .skip-button {{
+        .skip-button {
             background: #e74c3c;
             color: white;
-        }}
+        }
         
-        .skip-button:hover {{
+        .skip-button:hover {
             background: #c0392b;
             transform: translateY(-1px);
             box-shadow: 0 4px 8px rgba(0,0,0,0.2);
-        }}
+        }
         
         /* Completion message */
-        .completion-message {{
+        .completion-message {
             text-align: center;
             padding: 50px;
             background: white;
             border-radius: 8px;
             box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        }}
+        }
         
-        .completion-title {{
+        .completion-title {
             font-size: 2em;
             color: #2ecc71;
             margin-bottom: 20px;
-        }}
+        }
         
         /* Tooltip styles */
-        .token-with-tooltip {{
+        .token-with-tooltip {
             position: relative;
+            display: inline-block;
+            padding: 2px 1px;
+            border-radius: 2px;
             cursor: help;
-        }}
+        }
+        .token-with-tooltip.example-target {
+            border: 2px solid red;
+            font-weight: bold;
+        }
         
-        .token-tooltip {{
-            position: absolute;
-            bottom: 100%;
-            left: 50%;
-            transform: translateX(-50%);
+        /* One shared tooltip, positioned over the hovered example token */
+        .token-tooltip {
+            position: fixed;
+            transform: translate(-50%, -100%);
             background: #333;
             color: white;
             padding: 4px 8px;
@@ -422,10 +559,10 @@ def generate_dashboard_html(data_path, output_path):
             pointer-events: none;
             transition: opacity 0.2s;
             z-index: 1000;
-            margin-bottom: 4px;
-        }}
+            margin-top: -4px;
+        }
         
-        .token-tooltip::after {{
+        .token-tooltip::after {
             content: '';
             position: absolute;
             top: 100%;
@@ -433,36 +570,36 @@ def generate_dashboard_html(data_path, output_path):
             transform: translateX(-50%);
             border: 4px solid transparent;
             border-top-color: #333;
-        }}
+        }
         
-        .token-with-tooltip:hover .token-tooltip {{
+        .token-tooltip.visible {
             opacity: 1;
-        }}
+        }
         
         /* Loading state */
-        .loading {{
+        .loading {
             text-align: center;
             padding: 50px;
             color: #666;
-        }}
+        }
         
-        .save-status {{
+        .save-status {
             margin-top: 10px;
             font-size: 0.9em;
             color: #666;
             text-align: center;
-        }}
+        }
         
-        .save-status.saved {{
+        .save-status.saved {
             color: #2ecc71;
-        }}
+        }
         
-        .save-status.error {{
+        .save-status.error {
             color: #e74c3c;
-        }}
+        }
         
         /* Context panel styles */
-        .context-header {{
+        .context-header {
             position: sticky;
             top: 0;
             background: #f8f9fa;
@@ -474,32 +611,32 @@ def generate_dashboard_html(data_path, output_path):
             align-items: center;
             flex-wrap: wrap;
             gap: 15px;
-        }}
+        }
         
-        .context-header-left {{
+        .context-header-left {
             display: flex;
             flex-direction: column;
-        }}
+        }
         
-        .context-title {{
+        .context-title {
             font-size: 1.2em;
             font-weight: bold;
             color: #2c3e50;
             margin-bottom: 5px;
-        }}
+        }
         
-        .context-info {{
+        .context-info {
             font-size: 0.9em;
             color: #666;
-        }}
+        }
         
-        .rollout-navigation {{
+        .rollout-navigation {
             display: flex;
             align-items: center;
             gap: 10px;
-        }}
+        }
         
-        .rollout-nav-button {{
+        .rollout-nav-button {
             background: #fff;
             border: 1px solid #ddd;
             padding: 6px 12px;
@@ -507,34 +644,34 @@ def generate_dashboard_html(data_path, output_path):
             cursor: pointer;
             font-size: 1.1em;
             transition: all 0.2s;
-        }}
+        }
         
-        .rollout-nav-button:hover {{
+        .rollout-nav-button:hover {
             background: #f0f0f0;
             border-color: #999;
-        }}
+        }
         
-        .rollout-nav-button:disabled {{
+        .rollout-nav-button:disabled {
             opacity: 0.5;
             cursor: not-allowed;
-        }}
+        }
         
-        .rollout-input {{
+        .rollout-input {
             width: 80px;
             padding: 6px 10px;
             border: 1px solid #ddd;
             border-radius: 4px;
             text-align: center;
             font-size: 1em;
-        }}
+        }
         
-        .rollout-input:focus {{
+        .rollout-input:focus {
             outline: none;
             border-color: #3498db;
             box-shadow: 0 0 0 2px rgba(52, 152, 219, 0.2);
-        }}
+        }
         
-        .context-content {{
+        .context-content {
             flex: 1;
             padding: 20px;
             padding-right: 40px; /* Extra padding for position indicator and scrollbar */
@@ -544,24 +681,24 @@ def generate_dashboard_html(data_path, output_path):
             white-space: pre-wrap;
             word-wrap: break-word;
             overflow-y: auto;
-        }}
+        }
         
-        .target-token {{
+        .target-token {
             background-color: rgba(255, 0, 0, 0.2);
             border: 2px solid red;
             padding: 2px 4px;
             border-radius: 3px;
             font-weight: bold;
-        }}
+        }
         
-        .context-loading {{
+        .context-loading {
             text-align: center;
             padding: 50px;
             color: #666;
-        }}
+        }
         
         /* Position indicator (minimap) */
-        .position-indicator {{
+        .position-indicator {
             position: absolute;
             right: 15px; /* Leave room for scrollbar */
             top: 0;
@@ -570,9 +707,9 @@ def generate_dashboard_html(data_path, output_path):
             background: #f0f0f0;
             border-left: 1px solid #ddd;
             border-right: 1px solid #ddd;
-        }}
+        }
         
-        .position-marker {{
+        .position-marker {
             position: absolute;
             left: 0;
             width: 100%;
@@ -581,44 +718,44 @@ def generate_dashboard_html(data_path, output_path):
             border: 1px solid white;
             z-index: 10;
             transition: top 0.3s ease;
-        }}
+        }
         
-        .activation-heatmap {{
+        .activation-heatmap {
             position: absolute;
             top: 0;
             left: 0;
             width: 100%;
             height: 100%;
-        }}
+        }
         
-        .heatmap-line {{
+        .heatmap-line {
             position: absolute;
             left: 0;
             width: 100%;
             opacity: 0.8;
-        }}
+        }
         
         /* Highlight control sliders */
-        .highlight-controls {{
+        .highlight-controls {
             display: flex;
             gap: 20px;
             align-items: center;
             flex-wrap: wrap;
-        }}
+        }
         
-        .slider-group {{
+        .slider-group {
             display: flex;
             align-items: center;
             gap: 8px;
-        }}
+        }
         
-        .slider-label {{
+        .slider-label {
             font-size: 0.85em;
             color: #666;
             min-width: 80px;
-        }}
+        }
         
-        .highlight-slider {{
+        .highlight-slider {
             width: 120px;
             height: 6px;
             -webkit-appearance: none;
@@ -626,13 +763,13 @@ def generate_dashboard_html(data_path, output_path):
             background: #ddd;
             border-radius: 3px;
             outline: none;
-        }}
+        }
         
-        .highlight-slider.threshold-slider {{
+        .highlight-slider.threshold-slider {
             width: 180px;
-        }}
+        }
         
-        .highlight-slider::-webkit-slider-thumb {{
+        .highlight-slider::-webkit-slider-thumb {
             -webkit-appearance: none;
             appearance: none;
             width: 16px;
@@ -640,34 +777,34 @@ def generate_dashboard_html(data_path, output_path):
             background: #3498db;
             border-radius: 50%;
             cursor: pointer;
-        }}
+        }
         
-        .highlight-slider::-moz-range-thumb {{
+        .highlight-slider::-moz-range-thumb {
             width: 16px;
             height: 16px;
             background: #3498db;
             border-radius: 50%;
             cursor: pointer;
             border: none;
-        }}
+        }
         
-        .slider-value {{
+        .slider-value {
             font-size: 0.85em;
             color: #333;
             min-width: 40px;
             text-align: right;
-        }}
+        }
         
         /* Logit Lens Styles */
-        .logit-lens-section {{
+        .logit-lens-section {
             background: #f8f9fa;
             border-radius: 6px;
             margin-top: 15px;
             overflow: hidden;
             border: 1px solid #e0e0e0;
-        }}
+        }
         
-        .logit-lens-header {{
+        .logit-lens-header {
             display: flex;
             align-items: center;
             padding: 10px 15px;
@@ -675,110 +812,113 @@ def generate_dashboard_html(data_path, output_path):
             user-select: none;
             background: #e9ecef;
             transition: background 0.2s;
-        }}
+        }
         
-        .logit-lens-header:hover {{
+        .logit-lens-header:hover {
             background: #dee2e6;
-        }}
+        }
         
-        .logit-lens-icon {{
+        .logit-lens-icon {
             font-size: 1.2em;
             margin-right: 8px;
-        }}
+        }
         
-        .logit-lens-title {{
+        .logit-lens-title {
             flex: 1;
             font-weight: bold;
             color: #2c3e50;
             font-size: 0.95em;
-        }}
+        }
         
-        .logit-lens-content {{
+        .logit-lens-content {
             padding: 15px;
             background: white;
             max-height: 400px;
             overflow-y: auto;
             transition: max-height 0.3s ease-out;
-        }}
+        }
         
-        .logit-lens-content.collapsed {{
+        .logit-lens-content.collapsed {
             max-height: 0;
             padding: 0 15px;
             overflow: hidden;
-        }}
+        }
         
-        .logit-lens-loading {{
+        .logit-lens-loading {
             text-align: center;
             color: #666;
             padding: 20px;
-        }}
+        }
         
-        .logit-lens-group {{
+        .logit-lens-group {
             margin-bottom: 20px;
-        }}
+        }
         
-        .logit-lens-group-title {{
+        .logit-lens-group-title {
             font-weight: bold;
             color: #2c3e50;
             margin-bottom: 10px;
             font-size: 0.9em;
-        }}
+        }
         
-        .token-entry {{
+        .token-entry {
             display: flex;
             align-items: center;
             margin-bottom: 6px;
             font-family: 'Monaco', 'Consolas', monospace;
             font-size: 0.85em;
-        }}
+        }
         
-        .token-text {{
+        .token-text {
             flex: 0 0 150px;
             margin-right: 10px;
             overflow: hidden;
             text-overflow: ellipsis;
             white-space: nowrap;
-        }}
+        }
         
-        .token-value {{
+        .token-value {
             flex: 0 0 60px;
             text-align: right;
             margin-right: 10px;
             font-weight: bold;
-        }}
+        }
         
-        .token-bar {{
+        .token-bar {
             flex: 1;
             height: 18px;
             background: #e0e0e0;
             border-radius: 3px;
             overflow: hidden;
             position: relative;
-        }}
+        }
         
-        .token-bar-fill {{
+        .token-bar-fill {
             height: 100%;
             position: absolute;
             left: 0;
             top: 0;
             transition: width 0.3s ease;
-        }}
+        }
         
-        .token-bar-fill.positive {{
+        .token-bar-fill.positive {
             background: #2ecc71;
-        }}
+        }
         
-        .token-bar-fill.negative {{
+        .token-bar-fill.negative {
             background: #e74c3c;
-        }}
+        }
         
-        .token-bar-fill.activating {{
+        .token-bar-fill.activating {
             background: #3498db;
-        }}
+        }
         
-        .token-bar-fill.inhibiting {{
+        .token-bar-fill.inhibiting {
             background: #e67e22;
-        }}
+        }
+        
+        /* Activation palette (after .target-token so a highlight overrides its default background) */
+@@PALETTE_CSS@@
     </style>
 </head>
 <body>
@@ -804,7 +944,7 @@ def generate_dashboard_html(data_path, output_path):
                     <div class="progress-stats">
                         <span id="interpreted-count">Interpreted: 0</span>
                         <span id="skipped-count">Skipped: 0</span>
-                        <span id="remaining-count">Remaining: {total_features}</span>
+                        <span id="remaining-count">Remaining: @@TOTAL_FEATURES@@</span>
                     </div>
                 </div>
                 
@@ -874,32 +1014,119 @@ def generate_dashboard_html(data_path, output_path):
         <div class="save-status" id="save-status"></div>
     </div> <!-- end main-layout -->
     
+    <div class="token-tooltip" id="global-token-tooltip"></div>
+    
+    <!-- Source for the activations Web Worker; loaded through a Blob URL so it also works from file:// -->
+    <script type="text/js-worker" id="activations-worker">
+        // Fetches and inflates a rollout's activations off the main thread
+        async function fetchActivations(url) {
+            const response = await fetch(url);
+            if (!response.ok) {
+                throw new Error('Failed to load activations');
+            }
+            const shape = response.headers.get('X-Shape').split(',').map(Number);
+            const byteLength = shape.reduce((a, b) => a * b, 1) * 2; // float16
+            
+            // Copy each inflated chunk into a buffer sized from the shape as it
+            // arrives, rather than collecting the chunks and concatenating them
+            const bytes = new Uint8Array(byteLength);
+            const reader = response.body.pipeThrough(new DecompressionStream('gzip')).getReader();
+            let offset = 0;
+            for (;;) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                if (offset + value.length > byteLength) {
+                    throw new Error('Activations larger than their shape');
+                }
+                bytes.set(value, offset);
+                offset += value.length;
+            }
+            if (offset !== byteLength) {
+                throw new Error('Activations smaller than their shape');
+            }
+            return { shape, buffer: bytes.buffer };
+        }
+        
+        self.onmessage = (event) => {
+            const { id, url } = event.data;
+            fetchActivations(url).then(
+                ({ shape, buffer }) => self.postMessage({ id, shape, buffer }, [buffer]),
+                (error) => self.postMessage({ id, error: error.message })
+            );
+        };
+    </script>
     <script>
         // Store all features and current state
-        const allFeatures = {json.dumps(all_features)};
-        const totalFeatures = {total_features};
+        const allFeatures = @@FEATURES_JSON@@;
+        const totalFeatures = @@TOTAL_FEATURES@@;
         let currentFeature = null;
-        let interpretations = {{}};
-        let contextCache = {{}}; // Cache loaded contexts
+        let interpretations = {};
+        const featureByKey = new Map(allFeatures.map(feature => [feature.key, feature]));
+        let unannotatedKeys = allFeatures.map(feature => feature.key); // Features still needing an interpretation
+        const unannotatedPos = new Map(unannotatedKeys.map((key, idx) => [key, idx])); // Key -> index in unannotatedKeys
+        const failedSaves = new Map(); // featureKey -> last payload whose POST failed, retried on the next save or when back online
+        const pendingSaves = new Map(); // featureKey -> payload of the save in flight, until the server confirms it
+        let saveStatusTimer = null;
+        const contextCache = new Map(); // Hot tier of loaded contexts, least recently used first
+        const CONTEXT_CACHE_MAX = 64; // Contexts kept in memory; IndexedDB holds the rest
+        const CACHE_VERSION = '@@CACHE_VERSION@@'; // Generation time; persisted contexts from other builds are dropped
+        let contextDbPromise = null; // IndexedDB connection for persisted contexts and activations (resolves to null if unavailable)
+        const CACHE_DB_STORES = ['rollouts', 'activations'];
         let selectedExample = null;
-        let activationsCache = {{}}; // Cache loaded activations
+        const activationsCache = new Map(); // Loaded activations by rollout, least recently used first
+        const ACTIVATIONS_CACHE_MAX = 10; // Decoded rollouts kept in memory
+        const ACTIVATIONS_DB_MAX = 50; // Decoded rollouts kept in IndexedDB (several MB each), oldest dropped first
+        const activationsInFlight = new Map(); // rolloutIdx -> pending fetch, so concurrent loads share it
         let currentActivations = null; // Currently displayed activations
+        let contextLoadId = 0; // Incremented per loadRolloutContext call so stale loads can bail out
         let currentRolloutIdx = null; // Track current rollout index
         let currentTokenIdx = null; // Track current token index
         let maxRolloutIdx = null; // Track maximum rollout index from metadata
         let highlightThreshold = 0; // Minimum activation magnitude for highlighting
         let highlightIntensity = 1; // Multiplier for highlight intensity
-        let logitLensCache = {{}}; // Cache for logit lens data
+        const logitLensCache = new Map(); // 'layer_projection_polarity' -> logit lens data
+        const logitLensInFlight = new Map(); // 'layer_projection_polarity' -> pending fetch
+        const logitLensPanels = new Map(); // featureKey -> {content, button, expanded, loaded} of the displayed feature's panel
+        // Background intensities are quantized to the .bg-pos-N / .bg-neg-N palette classes
+        const COLOR_BUCKETS = @@COLOR_BUCKETS@@;
+        const MAX_BG_ALPHA = @@MAX_BG_ALPHA@@;
+        const PROJ_IDX = { gate_proj: 0, up_proj: 1, down_proj: 2 }; // Projection axis of the activations array
+        const activationSliceCache = new Map(); // 'rolloutIdx|featureKey' -> per-token activations
+        let activationSliceSource = null; // Activations object the slice cache was built from
+        let activationWorker = null; // Worker that fetches and inflates activations (false once it failed to start)
+        let activationJobId = 0;
+        const activationJobs = new Map(); // Job id -> {resolve, reject} for in-flight worker requests
+        let tooltipTarget = null; // Example token the shared tooltip is showing
+        let exampleObserver = null; // Hydrates example token HTML as it scrolls into view
+        const EXAMPLE_ROOT_MARGIN = '400px'; // How far outside the viewport examples are pre-rendered
+        const tokenHtmlCache = new WeakMap(); // Example object -> rendered token HTML
+        let contextLines = []; // Newline-delimited token ranges of the displayed rollout
+        let contextLinesTokens = null; // Token array contextLines was built from
+        let contextRender = null; // Tokens, target and activations used to render context lines
+        let contextLineHtml = new Map(); // Line index -> rendered HTML for the current render
+        let lineMaxCache = {}; // Per-line max activations of the last heatmap build
+        let contextLineObserver = null; // Hydrates context lines as they scroll into view
+        const CONTEXT_ROOT_MARGIN = '400px'; // How far outside the viewport context lines are rendered
+        const DOM = {}; // Static page elements by camelCased id, filled in by cacheDomElements
+        let refreshScheduled = false; // A slider-driven context refresh is queued for the next frame
+        let scrollScheduled = false; // A context scroll update is queued for the next frame
+        let lastHeatmapScrollTop = 0; // Context scroll position of the last heatmap rebuild
+        const HEATMAP_SCROLL_STEP = 50; // Scroll distance (px) before the heatmap is rebuilt
+        const CONTEXT_EAGER_LINES = 20; // Lines around the target rendered before scrolling to it
+        const HTML_ESCAPES = { '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#039;' };
+        const PAKO_URL = 'https://cdnjs.cloudflare.com/ajax/libs/pako/2.1.0/pako.min.js'; // Inflate fallback
+        let pakoPromise = null; // Resolves to pako once loadPako has fetched it
+        let halfToFloatTable = null; // Fallback float16 -> float32 bit lookup, see getHalfToFloatTable
         
         // API configuration
         let API_PORT = localStorage.getItem('apiPort') || '8085';
         let API_BASE = 'http://localhost:' + API_PORT;
         
-        function updateApiPort() {{
-            const portInput = document.getElementById('api-port-input');
+        function updateApiPort() {
+            const portInput = DOM.apiPortInput;
             const newPort = portInput.value.trim();
             
-            if (newPort && !isNaN(newPort)) {{
+            if (newPort && !isNaN(newPort)) {
                 API_PORT = newPort;
                 API_BASE = 'http://localhost:' + API_PORT;
                 localStorage.setItem('apiPort', API_PORT);
@@ -913,246 +1140,406 @@ def generate_dashboard_html(data_path, output_path):
                 savedMsg.style.marginLeft = '10px';
                 portConfig.appendChild(savedMsg);
                 
-                setTimeout(() => {{
+                setTimeout(() => {
                     savedMsg.remove();
-                }}, 2000);
+                }, 2000);
                 
                 // Reload interpretations with new port
                 loadInterpretations();
-            }}
-        }}
+            }
+        }
         
-        async function loadInterpretations() {{
-            try {{
+        async function loadInterpretations() {
+            try {
                 const response = await fetch(API_BASE + '/api/interpretations');
-                if (response.ok) {{
+                if (response.ok) {
                     const data = await response.json();
-                    interpretations = data.interpretations || {{}};
+                    interpretations = data.interpretations || {};
+                    rebuildUnannotatedIndex();
                     updateProgress();
                     loadNextFeature();
-                }}
-            }} catch (error) {{
+                }
+            } catch (error) {
                 console.error('Failed to load interpretations:', error);
                 loadNextFeature();
-            }}
-        }}
+            }
+        }
         
-        function updateProgress() {{
+        function updateProgress() {
             let interpreted = 0;
             let skipped = 0;
             
-            Object.values(interpretations).forEach(interp => {{
-                if (interp && typeof interp === 'object') {{
-                    if (interp.skipped) {{
+            Object.values(interpretations).forEach(interp => {
+                if (interp && typeof interp === 'object') {
+                    if (interp.skipped) {
                         skipped++;
-                    }} else if (interp.text && interp.text.trim()) {{
+                    } else if (interp.text && interp.text.trim()) {
                         interpreted++;
-                    }}
-                }}
-            }});
+                    }
+                }
+            });
             
             const completed = interpreted + skipped;
             const remaining = totalFeatures - completed;
             const percentage = Math.round((completed / totalFeatures) * 100);
             
-            document.getElementById('progress-bar').style.width = percentage + '%';
-            document.getElementById('progress-text').textContent = percentage + '%';
-            document.getElementById('interpreted-count').textContent = 'Interpreted: ' + interpreted;
-            document.getElementById('skipped-count').textContent = 'Skipped: ' + skipped;
-            document.getElementById('remaining-count').textContent = 'Remaining: ' + remaining;
-        }}
-        
-        function getUnannotatedFeatures() {{
-            return allFeatures.filter(feature => {{
-                const interp = interpretations[feature.key];
-                // Include only if: no interpretation exists, or it exists but has no text and wasn't skipped
-                return !interp || (!interp.text?.trim() && !interp.skipped);
-            }});
-        }}
-        
-        function loadNextFeature() {{
-            const unannotated = getUnannotatedFeatures();
-            
-            if (unannotated.length === 0) {{
+            DOM.progressBar.style.width = percentage + '%';
+            DOM.progressText.textContent = percentage + '%';
+            DOM.interpretedCount.textContent = 'Interpreted: ' + interpreted;
+            DOM.skippedCount.textContent = 'Skipped: ' + skipped;
+            DOM.remainingCount.textContent = 'Remaining: ' + remaining;
+        }
+        
+        function isUnannotated(interp) {
+            // No interpretation exists, or it exists but has no text and wasn't skipped
+            return !interp || (!interp.text?.trim() && !interp.skipped);
+        }
+        
+        function rebuildUnannotatedIndex() {
+            unannotatedKeys = [];
+            unannotatedPos.clear();
+            for (const feature of allFeatures) {
+                if (isUnannotated(interpretations[feature.key])) {
+                    unannotatedPos.set(feature.key, unannotatedKeys.length);
+                    unannotatedKeys.push(feature.key);
+                }
+            }
+        }
+        
+        function updateUnannotatedIndex(featureKey) {
+            // O(1) update after one feature's interpretation changed (swap-remove from the array)
+            const pos = unannotatedPos.get(featureKey);
+            const unannotated = isUnannotated(interpretations[featureKey]);
+            if (unannotated && pos === undefined) {
+                unannotatedPos.set(featureKey, unannotatedKeys.length);
+                unannotatedKeys.push(featureKey);
+            } else if (!unannotated && pos !== undefined) {
+                const lastKey = unannotatedKeys.pop();
+                if (lastKey !== featureKey) {
+                    unannotatedKeys[pos] = lastKey;
+                    unannotatedPos.set(lastKey, pos);
+                }
+                unannotatedPos.delete(featureKey);
+            }
+        }
+        
+        function loadNextFeature() {
+            if (unannotatedKeys.length === 0) {
                 showCompletionMessage();
                 return;
-            }}
+            }
             
             // Random selection
-            const randomIndex = Math.floor(Math.random() * unannotated.length);
-            currentFeature = unannotated[randomIndex];
+            const randomIndex = Math.floor(Math.random() * unannotatedKeys.length);
+            currentFeature = featureByKey.get(unannotatedKeys[randomIndex]);
             displayFeature(currentFeature);
-        }}
-        
-        function displayFeature(feature) {{
-            const container = document.getElementById('feature-container');
+            prefetchFeatureContext(currentFeature);
+        }
+        
+        function whenIdle(callback) {
+            // Background work that should not compete with rendering or input
+            if (window.requestIdleCallback) {
+                requestIdleCallback(callback, { timeout: 2000 });
+            } else {
+                setTimeout(callback, 200);
+            }
+        }
+        
+        function prefetchFeatureContext(feature) {
+            // Warm the caches for the logit lens panel and the example most likely
+            // to be clicked first, once the browser has finished rendering the new feature
+            const example = feature.examples[0];
+            whenIdle(() => {
+                prefetchLogitLensData(feature);
+                if (!example) return;
+                const rolloutIdx = example.rollout_idx;
+                if (!contextCache.has(rolloutIdx)) {
+                    getContext(rolloutIdx).catch(() => {}); // Errors resurface when the example is clicked
+                }
+                requestActivations(rolloutIdx).catch(() => {}); // Likewise
+            });
+        }
+        
+        function createElement(tag, className, text) {
+            const el = document.createElement(tag);
+            if (className) el.className = className;
+            if (text !== undefined) el.textContent = text;
+            return el;
+        }
+        
+        function displayFeature(feature) {
+            const container = DOM.featureContainer;
             const examples = feature.examples;
             
-            let html = `
-                <div class="feature-section">
-                    <div class="examples-container">
-            `;
+            // Build the nodes directly (no HTML parsing) and swap them in at once
+            const section = createElement('div', 'feature-section');
+            const examplesContainer = createElement('div', 'examples-container');
             
-            // Show all examples
-            examples.forEach((example, idx) => {{
+            // Show all examples; token HTML is filled in lazily as each one nears the viewport
+            examples.forEach((example, idx) => {
                 const rolloutIdx = example.rollout_idx;
                 const tokenIdx = example.token_idx;
                 const activation = example.activation.toFixed(3);
-                const tokenHtml = generateTokenHtml(example);
                 const exampleNum = idx + 1;
-                html += 
-                    '<div class="example-item" onclick="selectExample(' + idx + ', ' + rolloutIdx + ', ' + tokenIdx + ')">' +
-                        '<div class="example-info">Rollout ' + rolloutIdx + ', Example ' + exampleNum + ', Activation: ' + activation + '</div>' +
-                        '<div>' + tokenHtml + '</div>' +
-                    '</div>';
-            }});
-            
-            html += '</div>';
+                
+                const item = createElement('div', 'example-item');
+                item.addEventListener('click', () => selectExample(idx, rolloutIdx, tokenIdx));
+                item.appendChild(createElement('div', 'example-info',
+                    'Rollout ' + rolloutIdx + ', Example ' + exampleNum + ', Activation: ' + activation));
+                const tokensEl = createElement('div', 'example-tokens');
+                tokensEl.dataset.idx = idx;
+                item.appendChild(tokensEl);
+                examplesContainer.appendChild(item);
+            });
+            section.appendChild(examplesContainer);
             
             // Add logit lens section
             const projTitle = feature.projection === 'down_proj' ? 'Output Token Analysis' : 'Input Token Analysis';
-            html += 
-                    '<!-- Logit Lens Section -->' +
-                    '<div class="logit-lens-section" id="logit-lens-' + feature.key + '">' +
-                        '<div class="logit-lens-header" onclick="toggleLogitLens(\\'' + feature.key + '\\')">' +
-                            '<span class="logit-lens-icon">📊</span>' +
-                            '<span class="logit-lens-title" id="logit-lens-title-' + feature.key + '">' +
-                                projTitle +
-                            '</span>' +
-                            '<button class="collapse-button collapsed" id="logit-lens-btn-' + feature.key + '">▶</button>' +
-                        '</div>' +
-                        '<div class="logit-lens-content collapsed" id="logit-lens-content-' + feature.key + '">' +
-                            '<div class="logit-lens-loading">Loading analysis...</div>' +
-                        '</div>' +
-                    '</div>' +
-                '</div>';
+            const lensSection = createElement('div', 'logit-lens-section');
+            lensSection.id = 'logit-lens-' + feature.key;
+            
+            const lensHeader = createElement('div', 'logit-lens-header');
+            lensHeader.addEventListener('click', () => toggleLogitLens(feature.key));
+            const lensTitle = createElement('span', 'logit-lens-title', projTitle);
+            lensTitle.id = 'logit-lens-title-' + feature.key;
+            const lensButton = createElement('button', 'collapse-button collapsed', '▶');
+            lensButton.id = 'logit-lens-btn-' + feature.key;
+            lensHeader.append(createElement('span', 'logit-lens-icon', '📊'), lensTitle, lensButton);
+            
+            // Filled in by toggleLogitLens the first time it is expanded
+            const lensContent = createElement('div', 'logit-lens-content collapsed');
+            lensContent.id = 'logit-lens-content-' + feature.key;
+            lensContent.dataset.lazyFeatureKey = feature.key;
             
-            container.innerHTML = html;
-            document.getElementById('control-section').style.display = 'flex';
+            lensSection.append(lensHeader, lensContent);
+            section.appendChild(lensSection);
+            logitLensPanels.clear();
+            logitLensPanels.set(feature.key, { content: lensContent, button: lensButton, expanded: false, loaded: false });
+            
+            container.replaceChildren(section);
+            observeExamples(container, examples);
+            DOM.controlSection.style.display = 'flex';
             
             // Load existing interpretation if any
             const existing = interpretations[feature.key];
-            if (existing) {{
-                document.getElementById('interpretation-text-mini').value = existing.text || '';
-                document.getElementById('star-checkbox-mini').checked = existing.starred || false;
-            }} else {{
-                document.getElementById('interpretation-text-mini').value = '';
-                document.getElementById('star-checkbox-mini').checked = false;
-            }}
-        }}
-        
-        function generateTokenHtml(example) {{
+            if (existing) {
+                DOM.interpretationTextMini.value = existing.text || '';
+                DOM.starCheckboxMini.checked = existing.starred || false;
+            } else {
+                DOM.interpretationTextMini.value = '';
+                DOM.starCheckboxMini.checked = false;
+            }
+        }
+        
+        function observeExamples(container, examples) {
+            // Windowed rendering: only examples within EXAMPLE_ROOT_MARGIN of the
+            // left panel's viewport get their per-token spans built
+            if (exampleObserver) {
+                exampleObserver.disconnect();
+            }
+            const placeholders = container.querySelectorAll('.example-tokens');
+            
+            if (typeof IntersectionObserver === 'undefined') {
+                placeholders.forEach(el => hydrateExample(el, examples));
+                return;
+            }
+            
+            exampleObserver = new IntersectionObserver((entries, observer) => {
+                for (const entry of entries) {
+                    if (entry.isIntersecting) {
+                        hydrateExample(entry.target, examples);
+                        observer.unobserve(entry.target);
+                    }
+                }
+            }, { root: document.querySelector('.left-panel'), rootMargin: EXAMPLE_ROOT_MARGIN });
+            
+            placeholders.forEach(el => exampleObserver.observe(el));
+        }
+        
+        function hydrateExample(el, examples) {
+            el.innerHTML = generateTokenHtml(examples[Number(el.dataset.idx)]);
+        }
+        
+        function generateTokenHtml(example) {
+            // Example objects live in allFeatures for the whole session, so the
+            // rendered HTML can be memoized on the object itself
+            let html = tokenHtmlCache.get(example);
+            if (html === undefined) {
+                html = buildTokenHtml(example);
+                tokenHtmlCache.set(example, html);
+            }
+            return html;
+        }
+        
+        function colorBucket(intensity) {
+            return Math.min(COLOR_BUCKETS - 1, Math.round(intensity / MAX_BG_ALPHA * (COLOR_BUCKETS - 1)));
+        }
+        
+        function bgClass(positive, intensity) {
+            return (positive ? 'bg-pos-' : 'bg-neg-') + colorBucket(intensity);
+        }
+        
+        function showTokenTooltip(event) {
+            // Delegated from the feature container: show the shared tooltip above the
+            // hovered example token with that token's activation
+            const span = event.target.closest('.token-with-tooltip');
+            if (!span || span === tooltipTarget) return;
+            tooltipTarget = span;
+            
+            const rect = span.getBoundingClientRect();
+            const tooltip = DOM.globalTokenTooltip;
+            tooltip.textContent = span.dataset.act;
+            tooltip.style.left = (rect.left + rect.width / 2) + 'px';
+            tooltip.style.top = rect.top + 'px';
+            tooltip.classList.add('visible');
+        }
+        
+        function hideTokenTooltip(event) {
+            if (!tooltipTarget) return;
+            if (event.relatedTarget && tooltipTarget.contains(event.relatedTarget)) return;
+            tooltipTarget = null;
+            DOM.globalTokenTooltip.classList.remove('visible');
+        }
+        
+        function buildTokenHtml(example) {
             const tokens = example.context;
             const activations = example.context_activations;
             const targetIdx = example.target_position;
             
-            let html = '';
-            tokens.forEach((token, i) => {{
+            const parts = [];
+            tokens.forEach((token, i) => {
                 const activation = activations[i];
                 const absActivation = Math.abs(activation);
                 // Left panel always uses default values (no threshold, 1x intensity)
                 const intensity = Math.min(absActivation * 0.1, 0.7);
-                const bgColor = activation > 0 
-                    ? 'rgba(255, 0, 0, ' + intensity + ')' 
-                    : 'rgba(0, 0, 255, ' + intensity + ')';
-                
                 const tokenDisplay = token.replace(/\\n/g, '\\\\n').replace(/ /g, '&nbsp;');
                 
-                if (i === targetIdx) {{
-                    html += '<span class="token-with-tooltip" style="background-color: ' + bgColor + '; border: 2px solid red; font-weight: bold; padding: 2px 1px; border-radius: 2px; position: relative; display: inline-block;">';
-                }} else {{
-                    html += '<span class="token-with-tooltip" style="background-color: ' + bgColor + '; padding: 2px 1px; border-radius: 2px; position: relative; display: inline-block;">';
-                }}
-                
-                const activationStr = activation.toFixed(3);
-                html += tokenDisplay + '<span class="token-tooltip">' + activationStr + '</span></span>';
-            }});
-            
-            return html;
-        }}
-        
-        async function saveInterpretation(skipFeature = false) {{
-            if (!currentFeature) return;
+                parts.push(
+                    '<span class="token-with-tooltip ', bgClass(activation > 0, intensity),
+                    i === targetIdx ? ' example-target"' : '"',
+                    ' data-act="', activation.toFixed(3), '">', tokenDisplay, '</span>'
+                );
+            });
             
-            const text = document.getElementById('interpretation-text-mini').value;
-            const starred = document.getElementById('star-checkbox-mini').checked;
-            
-            const statusEl = document.getElementById('save-status');
-            statusEl.textContent = 'Saving...';
-            statusEl.className = 'save-status';
-            
-            try {{
-                const response = await fetch(API_BASE + '/api/interpretations', {{
-                    method: 'POST',
-                    headers: {{
-                        'Content-Type': 'application/json',
-                    }},
-                    body: JSON.stringify({{
-                        featureKey: currentFeature.key,
-                        text: text,
-                        starred: starred,
-                        skipped: skipFeature
-                    }})
-                }});
-                
-                if (response.ok) {{
-                    const data = await response.json();
-                    if (data && data.interpretation) {{
-                        interpretations[currentFeature.key] = data.interpretation;
-                    }} else {{
-                        // Create a minimal interpretation object if the API doesn't return one
-                        interpretations[currentFeature.key] = {{
-                            text: text,
-                            starred: starred,
-                            skipped: skipFeature,
-                            lastModified: new Date().toISOString()
-                        }};
-                    }}
-                    
-                    statusEl.textContent = 'Saved!';
-                    statusEl.className = 'save-status saved';
-                    
-                    updateProgress();
-                    
-                    setTimeout(() => {{
-                        statusEl.textContent = '';
-                        loadNextFeature();
-                    }}, 500);
-                }} else {{
+            return parts.join('');
+        }
+        
+        function sendInterpretation(payload) {
+            // keepalive lets the POST outlive the page, and unlike a beacon the response
+            // comes back, so a rejected or lost save lands in failedSaves
+            return fetch(API_BASE + '/api/interpretations', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify(payload),
+                keepalive: true
+            }).then(response => {
+                if (!response.ok) {
                     throw new Error('Save failed');
-                }}
-            }} catch (error) {{
+                }
+            });
+        }
+        
+        function postInterpretation(payload) {
+            const featureKey = payload.featureKey;
+            pendingSaves.set(featureKey, payload);
+            const settle = () => {
+                if (pendingSaves.get(featureKey) === payload) {
+                    pendingSaves.delete(featureKey);
+                }
+            };
+            sendInterpretation(payload).then(() => {
+                settle();
+                if (failedSaves.get(featureKey) === payload) {
+                    failedSaves.delete(featureKey);
+                }
+            }).catch(error => {
+                settle();
                 console.error('Failed to save:', error);
-                statusEl.textContent = 'Error saving';
-                statusEl.className = 'save-status error';
-            }}
-        }}
+                failedSaves.set(featureKey, payload);
+                clearTimeout(saveStatusTimer);
+                DOM.saveStatus.textContent = 'Error saving (will retry)';
+                DOM.saveStatus.className = 'save-status error';
+            });
+        }
+        
+        function retryFailedSaves() {
+            failedSaves.forEach(payload => postInterpretation(payload));
+        }
+        
+        function flushFailedSaves() {
+            // Last chance as the page goes away: nothing can observe a response now, so hand
+            // the unsent saves to sendBeacon. text/plain keeps each one a simple CORS
+            // request; the API parses the body as JSON either way.
+            if (!navigator.sendBeacon) return;
+            failedSaves.forEach(payload => {
+                navigator.sendBeacon(API_BASE + '/api/interpretations',
+                                     new Blob([JSON.stringify(payload)], { type: 'text/plain' }));
+            });
+        }
+        
+        function saveInterpretation(skipFeature = false) {
+            if (!currentFeature) return;
+            
+            const text = DOM.interpretationTextMini.value;
+            const starred = DOM.starCheckboxMini.checked;
+            const featureKey = currentFeature.key;
+            
+            // Apply the save locally and move on right away; the POST runs in the background
+            interpretations[featureKey] = {
+                text: text,
+                starred: starred,
+                skipped: skipFeature,
+                lastModified: new Date().toISOString()
+            };
+            updateUnannotatedIndex(featureKey);
+            failedSaves.delete(featureKey); // Superseded by this save
+            retryFailedSaves();
+            postInterpretation({
+                featureKey: featureKey,
+                text: text,
+                starred: starred,
+                skipped: skipFeature
+            });
+            
+            const statusEl = DOM.saveStatus;
+            statusEl.textContent = 'Saved!';
+            statusEl.className = 'save-status saved';
+            clearTimeout(saveStatusTimer);
+            saveStatusTimer = setTimeout(() => {
+                statusEl.textContent = '';
+            }, 500);
+            
+            updateProgress();
+            loadNextFeature();
+        }
         
-        function nextFeature() {{
+        function nextFeature() {
             saveInterpretation(false);
-        }}
+        }
         
-        function skipFeature() {{
+        function skipFeature() {
             saveInterpretation(true);
-        }}
+        }
         
-        function showCompletionMessage() {{
-            const container = document.getElementById('feature-container');
+        function showCompletionMessage() {
+            const container = DOM.featureContainer;
             container.innerHTML = 
                 '<div class="completion-message">' +
                     '<div class="completion-title">🎉 All Features Reviewed!</div>' +
                     '<p>You\\'ve gone through all available features.</p>' +
                     '<p>Total features: ' + totalFeatures + '</p>' +
                 '</div>';
-            document.getElementById('control-section').style.display = 'none';
-        }}
-        
-        async function loadRolloutContext(rolloutIdx, tokenIdx, fromNavigation = false) {{
-            const contextPanel = document.getElementById('context-panel');
-            const contextContent = document.getElementById('context-content');
-            const contextInfo = document.getElementById('context-info');
-            const rolloutNav = document.getElementById('rollout-navigation');
-            const rolloutInput = document.getElementById('rollout-input');
+            DOM.controlSection.style.display = 'none';
+        }
+        
+        async function loadRolloutContext(rolloutIdx, tokenIdx, fromNavigation = false) {
+            const contextPanel = DOM.contextPanel;
+            const contextContent = DOM.contextContent;
+            const contextInfo = DOM.contextInfo;
+            const rolloutNav = DOM.rolloutNavigation;
+            const rolloutInput = DOM.rolloutInput;
             
             // Update current rollout and token indices
             currentRolloutIdx = rolloutIdx;
@@ -1166,282 +1553,610 @@ def generate_dashboard_html(data_path, output_path):
             rolloutInput.value = rolloutIdx;
             
             // Show loading state
-            contextContent.innerHTML = '<div class="context-loading">Loading context and activations...</div>';
+            contextContent.innerHTML = '<div class="context-loading">Loading context...</div>';
             contextInfo.textContent = 'Rollout ' + rolloutIdx;
             
             // If navigating by rollout number, use token 0 as default
-            if (fromNavigation && tokenIdx === null) {{
+            if (fromNavigation && tokenIdx === null) {
                 tokenIdx = 0;
                 currentTokenIdx = 0;
-            }}
-            
-            try {{
-                // Load context and activations in parallel
-                const [contextData, activations] = await Promise.all([
-                    // Load context if not cached
-                    contextCache[rolloutIdx] || fetch(API_BASE + '/api/rollout_context/' + rolloutIdx).then(r => r.json()),
-                    // Load activations
-                    loadActivations(rolloutIdx)
-                ]);
-                
-                // Cache context if it was just loaded
-                if (!contextCache[rolloutIdx]) {{
-                    contextCache[rolloutIdx] = contextData;
-                }}
-                
-                // Store current activations
-                currentActivations = activations;
+            }
+            
+            const loadId = ++contextLoadId;
+            currentActivations = null;
+            
+            try {
+                // Show the text as soon as the context is in; activations only add highlighting
+                const contextData = await getContext(rolloutIdx);
+                if (loadId !== contextLoadId) return; // A newer load took over
                 
-                // Display with activations
-                displayContext(contextData.text, contextData.tokens, tokenIdx, activations);
+                const cachedActivations = getCachedActivations(rolloutIdx) || null;
+                currentActivations = cachedActivations;
+                displayContext(contextData, tokenIdx, cachedActivations);
                 
                 // Update navigation button states
                 updateNavigationButtons();
-            }} catch (error) {{
+                
+                if (!cachedActivations && currentFeature) {
+                    const activations = await loadActivations(rolloutIdx);
+                    if (loadId !== contextLoadId || !activations) return;
+                    currentActivations = activations;
+                    // Re-render the already displayed lines in place with highlighting
+                    displayContext(contextData, tokenIdx, activations, true);
+                }
+                if (currentFeature) {
+                    prefetchNeighbourActivations(rolloutIdx);
+                }
+            } catch (error) {
                 console.error('Failed to load context/activations:', error);
                 contextContent.innerHTML = '<div class="context-loading">Error loading data</div>';
-            }}
-        }}
+            }
+        }
         
-        function navigateRollout(direction) {{
+        function navigateRollout(direction) {
             if (currentRolloutIdx === null) return;
             
             const newIdx = currentRolloutIdx + direction;
-            if (newIdx >= 0 && (maxRolloutIdx === null || newIdx <= maxRolloutIdx)) {{
+            if (newIdx >= 0 && (maxRolloutIdx === null || newIdx <= maxRolloutIdx)) {
                 loadRolloutContext(newIdx, null, true);
-            }}
-        }}
+            }
+        }
         
-        function refreshContextDisplay() {{
+        function refreshContextDisplay() {
             // Re-display current context with updated highlight settings
-            if (currentRolloutIdx !== null && contextCache[currentRolloutIdx]) {{
-                const contextData = contextCache[currentRolloutIdx];
-                displayContext(contextData.text, contextData.tokens, currentTokenIdx, currentActivations, true);
-            }}
-        }}
-        
-        function updateNavigationButtons() {{
-            const prevButton = document.getElementById('prev-rollout');
-            const nextButton = document.getElementById('next-rollout');
+            if (currentRolloutIdx !== null && contextCache.has(currentRolloutIdx)) {
+                const contextData = contextCache.get(currentRolloutIdx);
+                displayContext(contextData, currentTokenIdx, currentActivations, true);
+            }
+        }
+        
+        function scheduleContextRefresh() {
+            // Slider drags fire input events far faster than the display can
+            // re-render; apply only the latest values, once per frame
+            if (refreshScheduled) return;
+            refreshScheduled = true;
+            requestAnimationFrame(() => {
+                refreshScheduled = false;
+                refreshContextDisplay();
+            });
+        }
+        
+        function updateNavigationButtons() {
+            const prevButton = DOM.prevRollout;
+            const nextButton = DOM.nextRollout;
             
-            if (currentRolloutIdx !== null) {{
+            if (currentRolloutIdx !== null) {
                 prevButton.disabled = currentRolloutIdx <= 0;
                 nextButton.disabled = maxRolloutIdx !== null && currentRolloutIdx >= maxRolloutIdx;
-            }}
-        }}
-        
-        function displayContext(fullText, tokens, tokenIdx, activations, fromSliderUpdate = false) {{
-            const contextContent = document.getElementById('context-content');
+            }
+        }
+        
+        function getActivationWorker() {
+            if (activationWorker === null) {
+                try {
+                    const source = document.getElementById('activations-worker').textContent;
+                    const url = URL.createObjectURL(new Blob([source], { type: 'text/javascript' }));
+                    activationWorker = new Worker(url);
+                    activationWorker.onmessage = (event) => {
+                        const job = activationJobs.get(event.data.id);
+                        activationJobs.delete(event.data.id);
+                        if (!job) return;
+                        if (event.data.error) {
+                            job.reject(new Error(event.data.error));
+                        } else {
+                            job.resolve(event.data);
+                        }
+                    };
+                    activationWorker.onerror = (event) => {
+                        // Fall back to the main thread from here on
+                        console.error('Activation worker failed:', event.message);
+                        activationJobs.forEach(job => job.reject(new Error('Activation worker failed')));
+                        activationJobs.clear();
+                        activationWorker.terminate();
+                        activationWorker = false;
+                    };
+                } catch (error) {
+                    activationWorker = false;
+                }
+            }
+            return activationWorker || null;
+        }
+        
+        function runWorkerJob(worker, message, transfer) {
+            // Post a job to the activations worker; resolves with its reply
+            const id = ++activationJobId;
+            return new Promise((resolve, reject) => {
+                activationJobs.set(id, { resolve, reject });
+                worker.postMessage({ id, ...message }, transfer);
+            });
+        }
+        
+        function getTokenActivations(activations, feature) {
+            // Per-token activations of one feature, gathered once per (rollout, feature)
+            if (activations !== activationSliceSource) {
+                activationSliceCache.clear();
+                activationSliceSource = activations;
+            }
+            const cacheKey = activations.rolloutIdx + '|' + feature.key;
+            if (activationSliceCache.has(cacheKey)) {
+                return activationSliceCache.get(cacheKey);
+            }
             
-            if (!tokens || tokens.length === 0) {{
-                // Fallback: just display the text without highlighting
-                const escapedText = fullText
-                    .replace(/&/g, '&amp;')
-                    .replace(/</g, '&lt;')
-                    .replace(/>/g, '&gt;')
-                    .replace(/"/g, '&quot;')
-                    .replace(/'/g, '&#039;');
-                contextContent.innerHTML = escapedText;
-                return;
-            }}
+            const [numTokens, numLayers, numProj] = activations.shape;
+            // Layers are stored in order, so the layer index is its position in the data
+            const layerPos = feature.layer < numLayers ? feature.layer : -1;
+            const projIdx = PROJ_IDX[feature.projection] ?? -1;
             
-            // Get activation for current feature if available
             let tokenActivations = null;
-            if (activations && currentFeature) {{
-                const layerIdx = currentFeature.layer;
-                const projIdx = ['gate_proj', 'up_proj', 'down_proj'].indexOf(currentFeature.projection);
-                const [numTokens, numLayers, numProj] = activations.shape;
-                
-                // Find layer position in the data
-                let layerPos = -1;
-                for (let i = 0; i < numLayers; i++) {{
-                    // Assuming layers are in order - we might need to map this properly
-                    if (i === layerIdx) {{
-                        layerPos = i;
-                        break;
-                    }}
-                }}
-                
-                if (layerPos >= 0 && projIdx >= 0) {{
-                    // Extract activations for this feature
-                    tokenActivations = new Float32Array(numTokens);
-                    for (let t = 0; t < numTokens; t++) {{
-                        const idx = t * numLayers * numProj + layerPos * numProj + projIdx;
-                        tokenActivations[t] = activations.data[idx];
-                    }}
-                }}
-            }}
-            
-            // Build the text with highlighted token and activation overlays
-            let html = '';
-            
-            // Concatenate tokens to rebuild the text with highlighting
-            tokens.forEach((token, idx) => {{
+            if (layerPos >= 0 && projIdx >= 0) {
+                // Data is laid out [numTokens, numLayers, numProj]
+                const data = activations.data;
+                const stride = numLayers * numProj;
+                const base = layerPos * numProj + projIdx;
+                tokenActivations = new Float32Array(numTokens);
+                for (let t = 0; t < numTokens; t++) {
+                    tokenActivations[t] = data[t * stride + base];
+                }
+            }
+            
+            activationSliceCache.set(cacheKey, tokenActivations);
+            return tokenActivations;
+        }
+        
+        function openContextDb() {
+            if (!contextDbPromise) {
+                contextDbPromise = new Promise((resolve) => {
+                    if (typeof indexedDB === 'undefined') return resolve(null);
+                    const request = indexedDB.open('lora-ctx', 3);
+                    request.onupgradeneeded = () => {
+                        const db = request.result;
+                        // Version 2 had no storedAt index; the activations store is only a cache
+                        if (db.objectStoreNames.contains('activations') &&
+                            !request.transaction.objectStore('activations').indexNames.contains('storedAt')) {
+                            db.deleteObjectStore('activations');
+                        }
+                        for (const name of CACHE_DB_STORES) {
+                            if (!db.objectStoreNames.contains(name)) db.createObjectStore(name);
+                        }
+                        const activationsStore = request.transaction.objectStore('activations');
+                        if (!activationsStore.indexNames.contains('storedAt')) {
+                            activationsStore.createIndex('storedAt', 'storedAt');
+                        }
+                    };
+                    // Another tab still has an older version open; use the network for now
+                    // rather than leave every cache read waiting on the upgrade
+                    let blocked = false;
+                    request.onblocked = () => {
+                        blocked = true;
+                        resolve(null);
+                    };
+                    request.onsuccess = () => {
+                        const db = request.result;
+                        if (blocked) {
+                            db.close(); // Opened after the page settled on the network; the next load uses it
+                            return;
+                        }
+                        // Let a newer dashboard in another tab upgrade the database
+                        db.onversionchange = () => db.close();
+                        // Keys are 'version|apiBase|rolloutIdx'; drop everything from other builds
+                        const prefix = CACHE_VERSION + '|';
+                        const tx = db.transaction(CACHE_DB_STORES, 'readwrite');
+                        for (const name of CACHE_DB_STORES) {
+                            const store = tx.objectStore(name);
+                            store.delete(IDBKeyRange.upperBound(prefix, true));
+                            store.delete(IDBKeyRange.lowerBound(prefix + '\\uffff', true));
+                        }
+                        resolve(db);
+                    };
+                    request.onerror = () => resolve(null);
+                });
+            }
+            return contextDbPromise;
+        }
+        
+        function contextDbKey(rolloutIdx) {
+            return CACHE_VERSION + '|' + API_BASE + '|' + rolloutIdx;
+        }
+        
+        async function readStoredContext(rolloutIdx) {
+            const db = await openContextDb();
+            if (!db) return null;
+            return new Promise((resolve) => {
+                const request = db.transaction('rollouts').objectStore('rollouts').get(contextDbKey(rolloutIdx));
+                request.onsuccess = () => resolve(request.result || null);
+                request.onerror = () => resolve(null);
+            });
+        }
+        
+        function storeContext(rolloutIdx, contextData) {
+            // Copy now so the derived token arrays added later are not persisted
+            const record = { ...contextData };
+            openContextDb().then(db => {
+                if (db) {
+                    db.transaction('rollouts', 'readwrite').objectStore('rollouts').put(record, contextDbKey(rolloutIdx));
+                }
+            });
+        }
+        
+        function rememberContext(rolloutIdx, contextData) {
+            // Re-inserting moves the entry to the most recently used end
+            contextCache.delete(rolloutIdx);
+            contextCache.set(rolloutIdx, contextData);
+            if (contextCache.size > CONTEXT_CACHE_MAX) {
+                contextCache.delete(contextCache.keys().next().value);
+            }
+        }
+        
+        async function getContext(rolloutIdx) {
+            // Memory first, then IndexedDB, then the API
+            let contextData = contextCache.get(rolloutIdx);
+            if (!contextData) {
+                contextData = await readStoredContext(rolloutIdx);
+                if (!contextData) {
+                    const response = await fetch(API_BASE + '/api/rollout_context/' + rolloutIdx);
+                    contextData = await response.json();
+                    storeContext(rolloutIdx, contextData);
+                }
+                prepareContextTokens(contextData);
+            }
+            rememberContext(rolloutIdx, contextData);
+            return contextData;
+        }
+        
+        function escapeHtml(text) {
+            // One pass over the string instead of a replace() per character
+            return text.replace(/[&<>"']/g, ch => HTML_ESCAPES[ch]);
+        }
+        
+        function prepareContextTokens(contextData) {
+            // Escape and lay out every token once when a rollout is loaded, so
+            // re-renders (slider changes, scrolling) only look the strings up
+            const escapedTokens = new Array(contextData.tokens.length);
+            const displayTokens = new Array(contextData.tokens.length);
+            contextData.tokens.forEach((token, idx) => {
                 // Escape the token
-                let escapedToken = token
-                    .replace(/&/g, '&amp;')
-                    .replace(/</g, '&lt;')
-                    .replace(/>/g, '&gt;')
-                    .replace(/"/g, '&quot;')
-                    .replace(/'/g, '&#039;');
+                const escapedToken = escapeHtml(token);
                 
                 // Check if token contains newline and handle specially
                 let displayToken = escapedToken;
                 let hasNewline = token.includes('\\n');
-                if (hasNewline) {{
+                if (hasNewline) {
                     // First, replace all newlines with visible \\n
                     let visibleNewlines = escapedToken.replace(/\\n/g, '<span style="opacity: 0.5;">\\\\n</span>');
                     // Then add line breaks for each original newline
                     const newlineCount = (token.match(/\\n/g) || []).length;
                     displayToken = visibleNewlines + '<br>'.repeat(newlineCount);
-                }}
+                }
                 
-                // Calculate activation background if available
-                let style = '';
-                if (tokenActivations && idx < tokenActivations.length) {{
-                    const activation = tokenActivations[idx];
-                    const polarity = currentFeature.polarity;
-                    
-                    // Only show activation if it matches the polarity we're looking at
-                    if ((polarity === 'positive' && activation > 0) || 
-                        (polarity === 'negative' && activation < 0)) {{
-                        const absActivation = Math.abs(activation);
-                        // Apply threshold and intensity multiplier
-                        if (absActivation >= highlightThreshold) {{
-                            const intensity = Math.min(absActivation * 0.1 * highlightIntensity, 0.9);
-                            const color = polarity === 'positive' 
-                                ? 'rgba(255, 0, 0, ' + intensity + ')' 
-                                : 'rgba(0, 0, 255, ' + intensity + ')';
-                            style = 'style="background-color: ' + color + ';"';
-                        }}
-                    }}
-                }}
+                escapedTokens[idx] = escapedToken;
+                displayTokens[idx] = displayToken;
+            });
+            contextData.escapedTokens = escapedTokens;
+            contextData.displayTokens = displayTokens;
+        }
+        
+        function buildHighlightMask(tokenActivations) {
+            // 1 for tokens whose activation matches the feature's polarity and clears the
+            // threshold; null when nothing would be highlighted so rendering skips the check
+            if (!tokenActivations || !currentFeature) return null;
+            
+            let maxAbs = 0;
+            for (let t = 0; t < tokenActivations.length; t++) {
+                const v = tokenActivations[t];
+                const a = v < 0 ? -v : v;
+                if (a > maxAbs) maxAbs = a;
+            }
+            if (maxAbs === 0 || maxAbs < highlightThreshold) return null;
+            
+            const sign = currentFeature.polarity === 'positive' ? 1 : -1;
+            const mask = new Uint8Array(tokenActivations.length);
+            let count = 0;
+            for (let t = 0; t < tokenActivations.length; t++) {
+                const v = tokenActivations[t] * sign; // Positive when the sign matches the polarity
+                if (v > 0 && v >= highlightThreshold) {
+                    mask[t] = 1;
+                    count++;
+                }
+            }
+            return count > 0 ? mask : null;
+        }
+        
+        function displayContext(contextData, tokenIdx, activations, fromSliderUpdate = false) {
+            const contextContent = DOM.contextContent;
+            const { text: fullText, tokens, displayTokens } = contextData;
+            
+            if (!tokens || tokens.length === 0) {
+                // Fallback: just display the text without highlighting
+                const escapedText = escapeHtml(fullText);
+                if (contextLineObserver) {
+                    contextLineObserver.disconnect();
+                }
+                contextRender = null;
+                contextContent.innerHTML = escapedText;
+                return;
+            }
+            
+            // Get activation for current feature if available
+            const tokenActivations = (activations && currentFeature)
+                ? getTokenActivations(activations, currentFeature)
+                : null;
+            
+            // Build the text with highlighted token and activation overlays.
+            // Each newline-delimited line is its own element; only lines near
+            // the viewport get their token spans, the rest are sized placeholders.
+            if (fromSliderUpdate && contextRender && contextRender.tokens === tokens) {
+                contextRender.tokenActivations = tokenActivations;
+                contextRender.highlightMask = buildHighlightMask(tokenActivations);
+                contextLineHtml = new Map();
+                contextContent.querySelectorAll('.context-line[data-hydrated]').forEach(lineEl => {
+                    lineEl.innerHTML = renderContextLine(Number(lineEl.dataset.line));
+                });
+            } else {
+                if (contextLinesTokens !== tokens) {
+                    contextLines = splitContextLines(tokens);
+                    contextLinesTokens = tokens;
+                }
+                contextRender = { tokens, displayTokens, tokenIdx, tokenActivations, highlightMask: buildHighlightMask(tokenActivations) };
+                contextLineHtml = new Map();
                 
-                if (idx === tokenIdx) {{
-                    // Highlight the target token with border
-                    html += '<span class="target-token" id="target-token" ' + style + '>' + displayToken + '</span>';
-                }} else {{
-                    // Regular token with activation background
-                    if (style) {{
-                        html += '<span ' + style + '>' + displayToken + '</span>';
-                    }} else {{
-                        html += displayToken;
-                    }}
-                }}
-            }});
-            
-            contextContent.innerHTML = html;
-            
-            // Build activation heatmap
-            if (tokenActivations && currentFeature) {{
+                const metrics = measureContextMetrics(contextContent);
+                const fragment = document.createDocumentFragment();
+                contextLines.forEach((line, lineIdx) => {
+                    const rows = Math.max(1, Math.ceil(line.chars / metrics.charsPerRow)) + line.blankRows;
+                    const lineEl = createElement('div', 'context-line');
+                    lineEl.dataset.line = lineIdx;
+                    lineEl.style.height = (rows * metrics.lineHeight) + 'px';
+                    fragment.appendChild(lineEl);
+                });
+                contextContent.replaceChildren(fragment);
+                
+                // Render the lines around the target up front so it can be scrolled to
+                const targetLine = findContextLine(tokenIdx);
+                const lineEls = contextContent.children;
+                const firstEager = Math.max(0, targetLine - CONTEXT_EAGER_LINES);
+                const lastEager = Math.min(lineEls.length - 1, targetLine + CONTEXT_EAGER_LINES);
+                for (let i = firstEager; i <= lastEager; i++) {
+                    hydrateContextLine(lineEls[i]);
+                }
+                observeContextLines(contextContent);
+            }
+            
+            // Build activation heatmap (or clear the previous rollout's until activations arrive)
+            if (tokenActivations && currentFeature) {
                 buildActivationHeatmap(tokens, tokenActivations);
-            }}
+            } else {
+                DOM.activationHeatmap.replaceChildren();
+            }
             
             // Scroll to the highlighted token only if not from a slider update
-            if (!fromSliderUpdate) {{
-                setTimeout(() => {{
+            if (!fromSliderUpdate) {
+                setTimeout(() => {
                     const targetElement = document.getElementById('target-token');
-                    if (targetElement) {{
-                        targetElement.scrollIntoView({{ behavior: 'smooth', block: 'center' }});
+                    if (targetElement) {
+                        targetElement.scrollIntoView({ behavior: 'smooth', block: 'center' });
                         updatePositionMarker();
-                    }}
-                }}, 100);
-            }}
-        }}
+                    }
+                }, 100);
+            }
+        }
+        
+        function splitContextLines(tokens) {
+            // Group tokens into lines ending at (and including) each newline token,
+            // with enough size info to give unrendered lines a placeholder height
+            const lines = [];
+            let start = 0;
+            let chars = 0;
+            tokens.forEach((token, idx) => {
+                chars += token.length;
+                if (token.includes('\\n')) {
+                    const newlineCount = (token.match(/\\n/g) || []).length;
+                    // Each newline is shown as a two-character "\\n" marker plus a <br>;
+                    // the first <br> only ends the line, any further ones add blank rows
+                    lines.push({ start, end: idx + 1, chars: chars + newlineCount, blankRows: newlineCount - 1 });
+                    start = idx + 1;
+                    chars = 0;
+                }
+            });
+            if (start < tokens.length) {
+                lines.push({ start, end: tokens.length, chars, blankRows: 0 });
+            }
+            return lines;
+        }
+        
+        function findContextLine(tokenIdx) {
+            // Binary search for the line containing tokenIdx (line 0 if there is none)
+            let lo = 0;
+            let hi = contextLines.length - 1;
+            while (lo < hi) {
+                const mid = (lo + hi + 1) >> 1;
+                if (contextLines[mid].start <= tokenIdx) {
+                    lo = mid;
+                } else {
+                    hi = mid - 1;
+                }
+            }
+            return Math.max(lo, 0);
+        }
+        
+        function measureContextMetrics(contextContent) {
+            // Row height and characters per row of the monospace context text
+            const probe = document.createElement('span');
+            probe.textContent = 'M'.repeat(64);
+            contextContent.appendChild(probe);
+            const charWidth = probe.getBoundingClientRect().width / 64;
+            probe.remove();
+            
+            const style = getComputedStyle(contextContent);
+            const lineHeight = parseFloat(style.lineHeight) || parseFloat(style.fontSize) * 1.5;
+            const textWidth = contextContent.clientWidth - parseFloat(style.paddingLeft) - parseFloat(style.paddingRight);
+            const charsPerRow = charWidth > 0 ? Math.max(1, Math.floor(textWidth / charWidth)) : 80;
+            return { lineHeight, charsPerRow };
+        }
+        
+        function renderContextLine(lineIdx) {
+            const cached = contextLineHtml.get(lineIdx);
+            if (cached !== undefined) return cached;
+            
+            const { displayTokens, tokenIdx, tokenActivations, highlightMask } = contextRender;
+            const positive = Boolean(currentFeature) && currentFeature.polarity === 'positive';
+            const line = contextLines[lineIdx];
+            const parts = [];
+            
+            for (let idx = line.start; idx < line.end; idx++) {
+                const displayToken = displayTokens[idx];
+                
+                // Activation background for tokens that pass the polarity/threshold mask
+                let bg = '';
+                if (highlightMask && highlightMask[idx]) {
+                    const intensity = Math.min(Math.abs(tokenActivations[idx]) * 0.1 * highlightIntensity, 0.9);
+                    bg = bgClass(positive, intensity);
+                }
+                
+                if (idx === tokenIdx) {
+                    // Highlight the target token with border
+                    parts.push('<span class="target-token ', bg, '" id="target-token">', displayToken, '</span>');
+                } else {
+                    // Regular token with activation background
+                    if (bg) {
+                        parts.push('<span class="', bg, '">', displayToken, '</span>');
+                    } else {
+                        parts.push(displayToken);
+                    }
+                }
+            }
+            
+            const html = parts.join('');
+            contextLineHtml.set(lineIdx, html);
+            return html;
+        }
+        
+        function hydrateContextLine(lineEl) {
+            if (lineEl.dataset.hydrated) return;
+            lineEl.innerHTML = renderContextLine(Number(lineEl.dataset.line));
+            lineEl.style.height = '';
+            lineEl.dataset.hydrated = '1';
+        }
+        
+        function dehydrateContextLine(lineEl, height) {
+            // Swap a far-away line back to an empty placeholder of its rendered height;
+            // the target line stays rendered so the position marker can find it
+            if (!lineEl.dataset.hydrated || lineEl.querySelector('#target-token')) return;
+            lineEl.style.height = height + 'px';
+            lineEl.textContent = '';
+            delete lineEl.dataset.hydrated;
+        }
+        
+        function observeContextLines(contextContent) {
+            if (contextLineObserver) {
+                contextLineObserver.disconnect();
+            }
+            const lineEls = contextContent.querySelectorAll('.context-line');
+            
+            if (typeof IntersectionObserver === 'undefined') {
+                lineEls.forEach(hydrateContextLine);
+                return;
+            }
+            
+            contextLineObserver = new IntersectionObserver((entries) => {
+                for (const entry of entries) {
+                    if (entry.isIntersecting) {
+                        hydrateContextLine(entry.target);
+                    } else {
+                        dehydrateContextLine(entry.target, entry.boundingClientRect.height);
+                    }
+                }
+            }, { root: contextContent, rootMargin: CONTEXT_ROOT_MARGIN });
+            
+            lineEls.forEach(el => contextLineObserver.observe(el));
+        }
+        
+        function getLineMaxActivations(tokenActivations, polarity) {
+            // Largest polarity-matching |activation| per context line, computed from the
+            // line token ranges alone and reused across scroll-triggered heatmap rebuilds
+            if (lineMaxCache.tokenActivations === tokenActivations &&
+                lineMaxCache.lines === contextLines && lineMaxCache.polarity === polarity) {
+                return lineMaxCache.values;
+            }
+            
+            const sign = polarity === 'positive' ? 1 : -1;
+            const values = new Float32Array(contextLines.length);
+            contextLines.forEach((line, lineIdx) => {
+                let maxActivation = 0;
+                const end = Math.min(line.end, tokenActivations.length);
+                for (let t = line.start; t < end; t++) {
+                    const v = tokenActivations[t] * sign;
+                    if (v > maxActivation) maxActivation = v;
+                }
+                values[lineIdx] = maxActivation;
+            });
+            
+            lineMaxCache = { tokenActivations, lines: contextLines, polarity, values };
+            return values;
+        }
         
-        function buildActivationHeatmap(tokens, tokenActivations) {{
+        function buildActivationHeatmap(tokens, tokenActivations) {
             // Wait a bit for DOM to settle
-            setTimeout(() => {{
-                const heatmapContainer = document.getElementById('activation-heatmap');
-                const contextContent = document.getElementById('context-content');
+            setTimeout(() => {
+                const heatmapContainer = DOM.activationHeatmap;
+                const contextContent = DOM.contextContent;
                 const polarity = currentFeature.polarity;
                 
                 if (!heatmapContainer || !contextContent) return;
                 
-                // Clear existing heatmap
-                heatmapContainer.innerHTML = '';
+                // One heatmap line per context line; placeholders are sized like the
+                // rendered line, so this works whether or not the line is hydrated
+                const lineMax = getLineMaxActivations(tokenActivations, polarity);
+                const lineEls = contextContent.querySelectorAll('.context-line');
+                const lineCount = Math.min(lineEls.length, lineMax.length);
                 
-                // Get all spans in the content
-                const allSpans = contextContent.querySelectorAll('span');
-                const contentRect = contextContent.getBoundingClientRect();
-                const scrollTop = contextContent.scrollTop;
-                
-                // Group spans by line position
-                const lineMap = new Map(); // line position -> activations array
-                
-                allSpans.forEach((span, idx) => {{
-                    if (idx >= tokenActivations.length) return;
-                    
-                    const rect = span.getBoundingClientRect();
-                    const relativeTop = rect.top - contentRect.top + scrollTop;
-                    const lineKey = Math.floor(relativeTop / 20); // Group by ~20px lines
-                    
-                    if (!lineMap.has(lineKey)) {{
-                        lineMap.set(lineKey, []);
-                    }}
-                    lineMap.get(lineKey).push(tokenActivations[idx]);
-                }});
-                
-                // Also process text nodes that aren't in spans
-                let tokenIdx = 0;
-                for (let node of contextContent.childNodes) {{
-                    if (node.nodeType === Node.TEXT_NODE && node.textContent.trim() && tokenIdx < tokenActivations.length) {{
-                        // This is a token without activation styling
-                        const range = document.createRange();
-                        range.selectNode(node);
-                        const rect = range.getBoundingClientRect();
-                        const relativeTop = rect.top - contentRect.top + scrollTop;
-                        const lineKey = Math.floor(relativeTop / 20);
-                        
-                        if (!lineMap.has(lineKey)) {{
-                            lineMap.set(lineKey, []);
-                        }}
-                        lineMap.get(lineKey).push(tokenActivations[tokenIdx]);
-                        tokenIdx++;
-                    }} else if (node.nodeType === Node.ELEMENT_NODE) {{
-                        tokenIdx++;
-                    }}
-                }}
-                
-                // Create heatmap lines
+                // Read all geometry before touching the heatmap, so layout is computed once
+                const contentTop = contextContent.offsetTop;
                 const contentHeight = contextContent.scrollHeight;
+                const lineTops = new Float32Array(lineCount);
+                const lineHeights = new Float32Array(lineCount);
+                for (let i = 0; i < lineCount; i++) {
+                    if (lineMax[i] > 0 && lineMax[i] >= highlightThreshold) {
+                        lineTops[i] = lineEls[i].offsetTop - contentTop;
+                        lineHeights[i] = lineEls[i].offsetHeight;
+                    }
+                }
                 
-                lineMap.forEach((activations, lineKey) => {{
-                    // Find max activation matching polarity
-                    let maxActivation = 0;
-                    activations.forEach(activation => {{
-                        if ((polarity === 'positive' && activation > 0) || 
-                            (polarity === 'negative' && activation < 0)) {{
-                            maxActivation = Math.max(maxActivation, Math.abs(activation));
-                        }}
-                    }});
-                    
-                    if (maxActivation > 0 && maxActivation >= highlightThreshold) {{
-                        const lineTop = (lineKey * 20 / contentHeight) * 100;
-                        const lineHeight = (20 / contentHeight) * 100;
-                        
-                        const heatmapLine = document.createElement('div');
-                        heatmapLine.className = 'heatmap-line';
-                        heatmapLine.style.top = lineTop + '%';
-                        heatmapLine.style.height = Math.max(lineHeight, 0.5) + '%'; // Min 0.5% height
-                        
+                // Collect the bars off-document and replace the old heatmap in one go.
+                // Consecutive lines with the same (quantized) color share one bar.
+                const fragment = document.createDocumentFragment();
+                let run = null; // {bucket, lastLine, top, bottom} of the bar being extended
+                const flushRun = () => {
+                    const heatmapLine = document.createElement('div');
+                    heatmapLine.className = 'heatmap-line ' + (polarity === 'positive' ? 'bg-pos-' : 'bg-neg-') + run.bucket;
+                    heatmapLine.style.top = (run.top / contentHeight) * 100 + '%';
+                    heatmapLine.style.height = Math.max(((run.bottom - run.top) / contentHeight) * 100, 0.5) + '%'; // Min 0.5% height
+                    fragment.appendChild(heatmapLine);
+                };
+                
+                for (let lineIdx = 0; lineIdx < lineCount; lineIdx++) {
+                    const maxActivation = lineMax[lineIdx];
+                    if (maxActivation > 0 && maxActivation >= highlightThreshold) {
                         // Color based on intensity with multiplier
-                        const intensity = Math.min(maxActivation * 0.15 * highlightIntensity, 0.9);
-                        const color = polarity === 'positive' 
-                            ? 'rgba(255, 0, 0, ' + intensity + ')' 
-                            : 'rgba(0, 0, 255, ' + intensity + ')';
-                        heatmapLine.style.backgroundColor = color;
-                        
-                        heatmapContainer.appendChild(heatmapLine);
-                    }}
-                }});
-            }}, 150); // Delay to ensure DOM is rendered
-        }}
-        
-        function updatePositionMarker() {{
+                        const bucket = colorBucket(Math.min(maxActivation * 0.15 * highlightIntensity, 0.9));
+                        const lineBottom = lineTops[lineIdx] + lineHeights[lineIdx];
+                        if (run && run.bucket === bucket && run.lastLine === lineIdx - 1) {
+                            run.lastLine = lineIdx;
+                            run.bottom = lineBottom;
+                        } else {
+                            if (run) flushRun();
+                            run = { bucket, lastLine: lineIdx, top: lineTops[lineIdx], bottom: lineBottom };
+                        }
+                    }
+                }
+                if (run) flushRun();
+                heatmapContainer.replaceChildren(fragment);
+            }, 150); // Delay to ensure DOM is rendered
+        }
+        
+        function updatePositionMarker() {
             const targetElement = document.getElementById('target-token');
-            const contextContent = document.getElementById('context-content');
-            const positionMarker = document.getElementById('position-marker');
+            const contextContent = DOM.contextContent;
+            const positionMarker = DOM.positionMarker;
             
             if (!targetElement || !contextContent || !positionMarker) return;
             
@@ -1452,375 +2167,619 @@ def generate_dashboard_html(data_path, output_path):
             
             // Update the marker position
             positionMarker.style.top = markerPosition + '%';
-        }}
+        }
         
-        function selectExample(exampleIdx, rolloutIdx, tokenIdx) {{
+        function selectExample(exampleIdx, rolloutIdx, tokenIdx) {
             // Update selected state
             const allExamples = document.querySelectorAll('.example-item');
-            allExamples.forEach((el, idx) => {{
-                if (idx === exampleIdx) {{
+            allExamples.forEach((el, idx) => {
+                if (idx === exampleIdx) {
                     el.classList.add('selected');
-                }} else {{
+                } else {
                     el.classList.remove('selected');
-                }}
-            }});
+                }
+            });
             
             // Load the context
             selectedExample = exampleIdx;
             loadRolloutContext(rolloutIdx, tokenIdx, false);  // false indicates this is from clicking an example
-        }}
+        }
+        
+        function cacheDomElements() {
+            // Look the page's fixed elements up once instead of on every render/scroll
+            [
+                'activation-heatmap',
+                'api-port-input',
+                'context-content',
+                'context-info',
+                'context-panel',
+                'control-section',
+                'feature-container',
+                'global-token-tooltip',
+                'intensity-slider',
+                'intensity-value',
+                'interpretation-text-mini',
+                'interpreted-count',
+                'next-rollout',
+                'position-indicator',
+                'position-marker',
+                'prev-rollout',
+                'progress-bar',
+                'progress-text',
+                'remaining-count',
+                'rollout-input',
+                'rollout-navigation',
+                'save-status',
+                'skipped-count',
+                'star-checkbox-mini',
+                'threshold-slider',
+                'threshold-value',
+            ].forEach(id => {
+                DOM[id.replace(/-([a-z])/g, (_, c) => c.toUpperCase())] = document.getElementById(id);
+            });
+        }
+        
+        function registerServiceWorker() {
+            // Service workers need an http(s) origin; opening the file directly skips caching
+            if (!('serviceWorker' in navigator) || !location.protocol.startsWith('http')) return;
+            
+            navigator.serviceWorker.addEventListener('message', (event) => {
+                if (event.data && event.data.type === 'interpretations-updated') {
+                    // Fresh copy of the interpretations after a cached one was served. Local
+                    // edits the server has not confirmed yet are newer, so they are kept.
+                    const fresh = event.data.data.interpretations || {};
+                    for (const key in fresh) {
+                        if (!pendingSaves.has(key) && !failedSaves.has(key)) {
+                            interpretations[key] = fresh[key];
+                        }
+                    }
+                    rebuildUnannotatedIndex();
+                    updateProgress();
+                }
+            });
+            navigator.serviceWorker.register('sw.js').catch(error => {
+                console.error('Service worker registration failed:', error);
+            });
+        }
         
         // Initialize on load
-        window.addEventListener('DOMContentLoaded', async () => {{
+        window.addEventListener('DOMContentLoaded', async () => {
+            cacheDomElements();
+            registerServiceWorker();
+            window.addEventListener('online', retryFailedSaves);
+            window.addEventListener('pagehide', flushFailedSaves);
+            // mousemove rather than mouseover, so the tooltip comes back after a scroll hid it
+            DOM.featureContainer.addEventListener('mousemove', showTokenTooltip);
+            DOM.featureContainer.addEventListener('mouseout', hideTokenTooltip);
+            document.querySelector('.left-panel').addEventListener('scroll', hideTokenTooltip, { passive: true });
+            
             // Initialize port input with saved value
-            const portInput = document.getElementById('api-port-input');
-            if (portInput) {{
+            const portInput = DOM.apiPortInput;
+            if (portInput) {
                 portInput.value = API_PORT;
-            }}
+            }
             
             // Initialize highlight control sliders
-            const thresholdSlider = document.getElementById('threshold-slider');
-            const thresholdValue = document.getElementById('threshold-value');
-            const intensitySlider = document.getElementById('intensity-slider');
-            const intensityValue = document.getElementById('intensity-value');
+            const thresholdSlider = DOM.thresholdSlider;
+            const thresholdValue = DOM.thresholdValue;
+            const intensitySlider = DOM.intensitySlider;
+            const intensityValue = DOM.intensityValue;
             
-            if (thresholdSlider && thresholdValue) {{
-                thresholdSlider.addEventListener('input', (e) => {{
+            if (thresholdSlider && thresholdValue) {
+                thresholdSlider.addEventListener('input', (e) => {
                     highlightThreshold = parseFloat(e.target.value);
                     thresholdValue.textContent = highlightThreshold.toFixed(2);
                     // Refresh current display if context is loaded
-                    if (currentRolloutIdx !== null) {{
-                        refreshContextDisplay();
-                    }}
-                }});
-            }}
-            
-            if (intensitySlider && intensityValue) {{
-                intensitySlider.addEventListener('input', (e) => {{
+                    if (currentRolloutIdx !== null) {
+                        scheduleContextRefresh();
+                    }
+                });
+            }
+            
+            if (intensitySlider && intensityValue) {
+                intensitySlider.addEventListener('input', (e) => {
                     highlightIntensity = parseFloat(e.target.value);
                     intensityValue.textContent = highlightIntensity.toFixed(1) + 'x';
                     // Refresh current display if context is loaded
-                    if (currentRolloutIdx !== null) {{
-                        refreshContextDisplay();
-                    }}
-                }});
-            }}
-            
-            // Extract max rollout index from metadata if available
-            if (typeof allFeatures !== 'undefined' && allFeatures.length > 0) {{
+                    if (currentRolloutIdx !== null) {
+                        scheduleContextRefresh();
+                    }
+                });
+            }
+            
+            // Extract max rollout index from metadata if available, and unpack the
+            // float16 context activations shipped with each example
+            if (typeof allFeatures !== 'undefined' && allFeatures.length > 0) {
                 maxRolloutIdx = 0;
-                allFeatures.forEach(feature => {{
-                    feature.examples.forEach(example => {{
-                        if (example.rollout_idx > maxRolloutIdx) {{
+                allFeatures.forEach(feature => {
+                    feature.examples.forEach(example => {
+                        example.context_activations = decodeFloat16Base64(example.context_activations_f16);
+                        if (example.rollout_idx > maxRolloutIdx) {
                             maxRolloutIdx = example.rollout_idx;
-                        }}
-                    }});
-                }});
-            }}
+                        }
+                    });
+                });
+            }
             
             await loadInterpretations();
             
             // Add event listener for rollout input
-            const rolloutInput = document.getElementById('rollout-input');
-            if (rolloutInput) {{
-                rolloutInput.addEventListener('keypress', (e) => {{
-                    if (e.key === 'Enter') {{
+            const rolloutInput = DOM.rolloutInput;
+            if (rolloutInput) {
+                rolloutInput.addEventListener('keypress', (e) => {
+                    if (e.key === 'Enter') {
                         const rolloutIdx = parseInt(rolloutInput.value);
-                        if (!isNaN(rolloutIdx) && rolloutIdx >= 0) {{
+                        if (!isNaN(rolloutIdx) && rolloutIdx >= 0) {
                             loadRolloutContext(rolloutIdx, null, true);
-                        }}
-                    }}
-                }});
+                        }
+                    }
+                });
                 
-                rolloutInput.addEventListener('blur', () => {{
+                rolloutInput.addEventListener('blur', () => {
                     const rolloutIdx = parseInt(rolloutInput.value);
-                    if (!isNaN(rolloutIdx) && rolloutIdx >= 0) {{
+                    if (!isNaN(rolloutIdx) && rolloutIdx >= 0) {
                         loadRolloutContext(rolloutIdx, null, true);
-                    }}
-                }});
-            }}
+                    }
+                });
+            }
             
             // Add scroll listener for context panel
-            const contextContent = document.getElementById('context-content');
-            if (contextContent) {{
-                contextContent.addEventListener('scroll', () => {{
-                    updateScrollIndicator();
-                    // Rebuild heatmap on scroll if we have activations
-                    if (currentActivations && currentFeature) {{
-                        const tokens = contextCache[currentActivations.rolloutIdx]?.tokens;
-                        if (tokens) {{
-                            // Extract activations for current feature
-                            const layerIdx = currentFeature.layer;
-                            const projIdx = ['gate_proj', 'up_proj', 'down_proj'].indexOf(currentFeature.projection);
-                            const [numTokens, numLayers, numProj] = currentActivations.shape;
-                            
-                            let tokenActivations = null;
-                            let layerPos = -1;
-                            for (let i = 0; i < numLayers; i++) {{
-                                if (i === layerIdx) {{
-                                    layerPos = i;
-                                    break;
-                                }}
-                            }}
-                            
-                            if (layerPos >= 0 && projIdx >= 0) {{
-                                tokenActivations = new Float32Array(numTokens);
-                                for (let t = 0; t < numTokens; t++) {{
-                                    const idx = t * numLayers * numProj + layerPos * numProj + projIdx;
-                                    tokenActivations[t] = currentActivations.data[idx];
-                                }}
-                                buildActivationHeatmap(tokens, tokenActivations);
-                            }}
-                        }}
-                    }}
-                }});
-            }}
-        }});
-        
-        function updateScrollIndicator() {{
-            const contextContent = document.getElementById('context-content');
-            const positionIndicator = document.getElementById('position-indicator');
+            const contextContent = DOM.contextContent;
+            if (contextContent) {
+                contextContent.addEventListener('scroll', () => {
+                    // Coalesce scroll events into at most one update per frame
+                    if (scrollScheduled) return;
+                    scrollScheduled = true;
+                    requestAnimationFrame(() => {
+                        scrollScheduled = false;
+                        updateScrollIndicator();
+                        
+                        // Rebuild heatmap once the view has moved far enough to matter
+                        if (Math.abs(contextContent.scrollTop - lastHeatmapScrollTop) < HEATMAP_SCROLL_STEP) return;
+                        lastHeatmapScrollTop = contextContent.scrollTop;
+                        if (currentActivations && currentFeature) {
+                            const tokens = contextCache.get(currentActivations.rolloutIdx)?.tokens;
+                            if (tokens) {
+                                // Extract activations for current feature
+                                const tokenActivations = getTokenActivations(currentActivations, currentFeature);
+                                if (tokenActivations) {
+                                    buildActivationHeatmap(tokens, tokenActivations);
+                                }
+                            }
+                        }
+                    });
+                });
+            }
+        });
+        
+        function updateScrollIndicator() {
+            const contextContent = DOM.contextContent;
+            const positionIndicator = DOM.positionIndicator;
             
             if (!contextContent || !positionIndicator) return;
             
             // You could add a viewport indicator here if desired
             // For now, we just ensure the marker stays visible
-        }}
-        
-        async function loadActivations(rolloutIdx) {{
-            // Check cache first
-            if (activationsCache[rolloutIdx]) {{
-                return activationsCache[rolloutIdx];
-            }}
-            
-            try {{
-                const response = await fetch(API_BASE + '/api/activations/' + rolloutIdx);
-                if (!response.ok) {{
-                    throw new Error('Failed to load activations');
-                }}
-                
-                const data = await response.json();
-                
-                // Decode base64
-                const binaryString = atob(data.data);
-                const bytes = new Uint8Array(binaryString.length);
-                for (let i = 0; i < binaryString.length; i++) {{
-                    bytes[i] = binaryString.charCodeAt(i);
-                }}
-                
-                // Decompress using pako (we'll need to include this library)
-                const decompressed = pako.inflate(bytes);
+        }
+        
+        function halfToFloatBits(h) {
+            // IEEE-754 float16 bits -> float32 bits, integer-only (no Math.pow)
+            const sign = (h & 0x8000) << 16;
+            const em = h & 0x7fff;
+            if (em >= 0x7c00) return sign | 0x7f800000 | ((em & 0x3ff) << 13); // Inf/NaN
+            if (em >= 0x0400) return sign | ((em + 0x1c000) << 13); // Normal: rebias exponent by 127 - 15
+            if (em === 0) return sign; // Signed zero
+            // Subnormal: shift the mantissa up to an implicit leading one
+            const shift = Math.clz32(em) - 21;
+            return sign | ((113 - shift) << 23) | (((em << shift) & 0x3ff) << 13);
+        }
+        
+        function getHalfToFloatTable() {
+            // float16 bits -> float32 bits for all 65536 halves, built on the first
+            // fallback decode; a rollout has far more elements than that
+            if (!halfToFloatTable) {
+                halfToFloatTable = new Uint32Array(65536);
+                for (let h = 0; h < 65536; h++) {
+                    halfToFloatTable[h] = halfToFloatBits(h);
+                }
+            }
+            return halfToFloatTable;
+        }
+        
+        function decodeFloat16Bytes(bytes) {
+            // Little-endian float16 bytes -> activation array. Where Float16Array exists
+            // the bytes are kept as-is and read sites promote each element to a Number,
+            // at half the memory of a Float32Array; older browsers get float32 bit
+            // patterns written straight into a Float32Array.
+            const count = bytes.byteLength >> 1;
+            if (typeof Float16Array !== 'undefined' && bytes.byteOffset % 2 === 0) {
+                return new Float16Array(bytes.buffer, bytes.byteOffset, count);
+            }
+            const values = new Float32Array(count);
+            const bits = new Uint32Array(values.buffer);
+            const table = getHalfToFloatTable();
+            for (let i = 0; i < count; i++) {
+                bits[i] = table[bytes[2 * i] | (bytes[2 * i + 1] << 8)];
+            }
+            return values;
+        }
+        
+        function decodeFloat16Base64(encoded) {
+            // Base64 little-endian float16 (as written by pack_activations) -> activation array
+            if (Uint8Array.fromBase64) {
+                // Native base64 decode, then the same path as rollout activations
+                return decodeFloat16Bytes(Uint8Array.fromBase64(encoded));
+            }
+            const binaryString = atob(encoded);
+            const count = binaryString.length >> 1;
+            const values = new Float32Array(count);
+            const bits = new Uint32Array(values.buffer);
+            const table = getHalfToFloatTable();
+            for (let i = 0; i < count; i++) {
+                bits[i] = table[binaryString.charCodeAt(2 * i) | (binaryString.charCodeAt(2 * i + 1) << 8)];
+            }
+            return values;
+        }
+        
+        function loadPako() {
+            // Only browsers without DecompressionStream need pako; fetch it on first use
+            if (!pakoPromise) {
+                pakoPromise = new Promise((resolve, reject) => {
+                    const script = document.createElement('script');
+                    script.src = PAKO_URL;
+                    script.onload = () => resolve(window.pako);
+                    script.onerror = () => {
+                        pakoPromise = null;
+                        reject(new Error('Failed to load pako'));
+                    };
+                    document.head.appendChild(script);
+                });
+            }
+            return pakoPromise;
+        }
+        
+        async function gunzip(bytes) {
+            // The API gzips activations; inflate natively where the browser can
+            if (typeof DecompressionStream !== 'undefined') {
+                const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+                return new Uint8Array(await new Response(stream).arrayBuffer());
+            }
+            const pako = await loadPako();
+            return pako.inflate(bytes);
+        }
+        
+        async function fetchActivations(url) {
+            // Gzipped float16 bytes, with the array shape in the X-Shape header
+            const response = await fetch(url);
+            if (!response.ok) {
+                throw new Error('Failed to load activations');
+            }
+            const shape = response.headers.get('X-Shape').split(',').map(Number);
+            const bytes = new Uint8Array(await response.arrayBuffer());
+            return { shape, decompressed: await gunzip(bytes) };
+        }
+        
+        async function fetchActivationsInWorker(worker, url) {
+            // The inflated buffer is transferred back, not copied
+            const { shape, buffer } = await runWorkerJob(worker, { url }, []);
+            return { shape, decompressed: new Uint8Array(buffer) };
+        }
+        
+        function rememberActivations(rolloutIdx, activations) {
+            // Re-inserting moves the entry to the most recently used end
+            activationsCache.delete(rolloutIdx);
+            activationsCache.set(rolloutIdx, activations);
+            if (activationsCache.size > ACTIVATIONS_CACHE_MAX) {
+                activationsCache.delete(activationsCache.keys().next().value);
+            }
+        }
+        
+        function getCachedActivations(rolloutIdx) {
+            const activations = activationsCache.get(rolloutIdx);
+            if (activations) rememberActivations(rolloutIdx, activations);
+            return activations;
+        }
+        
+        async function readStoredActivations(rolloutIdx) {
+            const db = await openContextDb();
+            if (!db) return null;
+            return new Promise((resolve) => {
+                const request = db.transaction('activations').objectStore('activations').get(contextDbKey(rolloutIdx));
+                request.onsuccess = () => resolve(request.result || null);
+                request.onerror = () => resolve(null);
+            });
+        }
+        
+        function storeActivations(rolloutIdx, activations) {
+            // Typed arrays are structured-cloned as-is, so a reload skips fetch, inflate and decode
+            const record = { data: activations.data, shape: activations.shape, storedAt: Date.now() };
+            whenIdle(() => openContextDb().then(db => {
+                if (!db) return;
+                const store = db.transaction('activations', 'readwrite').objectStore('activations');
+                store.put(record, contextDbKey(rolloutIdx));
                 
-                // Convert to Float32Array (JS doesn't have Float16)
-                const float16Buffer = new ArrayBuffer(decompressed.length);
-                const float16View = new Uint8Array(float16Buffer);
-                float16View.set(decompressed);
-                
-                // For now, treat as Float32 (we'll lose some precision)
-                const numFloats = decompressed.length / 2;
-                const floatArray = new Float32Array(numFloats);
-                const dataView = new DataView(float16Buffer);
-                
-                // Simple float16 to float32 conversion
-                for (let i = 0; i < numFloats; i++) {{
-                    const float16 = dataView.getUint16(i * 2, true);
-                    // Simplified conversion - proper float16 conversion would be more complex
-                    const sign = (float16 >> 15) & 1;
-                    const exponent = (float16 >> 10) & 0x1f;
-                    const fraction = float16 & 0x3ff;
-                    
-                    if (exponent === 0) {{
-                        floatArray[i] = (sign ? -1 : 1) * Math.pow(2, -14) * (fraction / 1024);
-                    }} else if (exponent === 31) {{
-                        floatArray[i] = fraction ? NaN : (sign ? -Infinity : Infinity);
-                    }} else {{
-                        floatArray[i] = (sign ? -1 : 1) * Math.pow(2, exponent - 15) * (1 + fraction / 1024);
-                    }}
-                }}
-                
-                // Reshape to [num_tokens, num_layers, 3]
-                const activations = {{
-                    data: floatArray,
-                    shape: data.shape,
-                    rolloutIdx: rolloutIdx
-                }};
-                
-                // Cache it (limit cache size to 10 rollouts)
-                const cacheKeys = Object.keys(activationsCache);
-                if (cacheKeys.length >= 10) {{
-                    delete activationsCache[cacheKeys[0]];
-                }}
-                activationsCache[rolloutIdx] = activations;
-                
-                return activations;
-            }} catch (error) {{
+                // Keep the newest ACTIVATIONS_DB_MAX; a key cursor walks the index
+                // oldest first without reading the arrays
+                const countRequest = store.count();
+                countRequest.onsuccess = () => {
+                    let excess = countRequest.result - ACTIVATIONS_DB_MAX;
+                    if (excess <= 0) return;
+                    const cursorRequest = store.index('storedAt').openKeyCursor();
+                    cursorRequest.onsuccess = () => {
+                        const cursor = cursorRequest.result;
+                        if (!cursor || excess <= 0) return;
+                        store.delete(cursor.primaryKey);
+                        excess--;
+                        cursor.continue();
+                    };
+                };
+            }));
+        }
+        
+        async function fetchRolloutActivations(rolloutIdx) {
+            let stored = await readStoredActivations(rolloutIdx);
+            if (!stored) {
+                const url = API_BASE + '/api/activations/' + rolloutIdx;
+                // Fetch and inflate in the worker when it can, off the main thread. If the
+                // worker job fails (blocked Blob URL, DecompressionStream error), the
+                // main-thread path gets one try before the error reaches the page.
+                const worker = typeof DecompressionStream !== 'undefined' ? getActivationWorker() : null;
+                let loaded = null;
+                if (worker) {
+                    loaded = await fetchActivationsInWorker(worker, url).catch((error) => {
+                        console.warn('Activation worker load failed, retrying on the main thread:', error);
+                        return null;
+                    });
+                }
+                const { shape, decompressed } = loaded || await fetchActivations(url);
+                stored = { data: decodeFloat16Bytes(decompressed), shape };
+                storeActivations(rolloutIdx, stored);
+            }
+            
+            // Reshape to [num_tokens, num_layers, 3]
+            const activations = {
+                data: stored.data,
+                shape: stored.shape,
+                rolloutIdx: rolloutIdx
+            };
+            
+            rememberActivations(rolloutIdx, activations);
+            
+            return activations;
+        }
+        
+        function requestActivations(rolloutIdx) {
+            // Cached activations, or the one fetch in flight for the rollout; rejects on failure
+            const cached = getCachedActivations(rolloutIdx);
+            if (cached) {
+                return Promise.resolve(cached);
+            }
+            let pending = activationsInFlight.get(rolloutIdx);
+            if (!pending) {
+                pending = fetchRolloutActivations(rolloutIdx).finally(() => activationsInFlight.delete(rolloutIdx));
+                activationsInFlight.set(rolloutIdx, pending);
+            }
+            return pending;
+        }
+        
+        async function loadActivations(rolloutIdx) {
+            try {
+                return await requestActivations(rolloutIdx);
+            } catch (error) {
                 console.error('Failed to load activations:', error);
                 return null;
-            }}
-        }}
+            }
+        }
+        
+        function prefetchNeighbourActivations(rolloutIdx) {
+            // Browsing rollouts is mostly sequential; decode the adjacent ones while idle
+            whenIdle(() => {
+                for (const idx of [rolloutIdx + 1, rolloutIdx - 1]) {
+                    if (idx >= 0 && (maxRolloutIdx === null || idx <= maxRolloutIdx)) {
+                        requestActivations(idx).catch(() => {}); // Errors resurface if the rollout is opened
+                    }
+                }
+            });
+        }
         
         // Logit Lens Functions
-        function getLogitLensTitle(projection) {{
-            if (projection === 'down_proj') {{
+        function getLogitLensTitle(projection) {
+            if (projection === 'down_proj') {
                 return 'Output Token Analysis';
-            }} else {{
+            } else {
                 return 'Input Token Analysis';
-            }}
-        }}
+            }
+        }
         
-        function toggleLogitLens(featureKey) {{
-            const content = document.getElementById('logit-lens-content-' + featureKey);
-            const button = document.getElementById('logit-lens-btn-' + featureKey);
+        function toggleLogitLens(featureKey) {
+            const panel = logitLensPanels.get(featureKey);
+            if (!panel) return;
+            const { content, button } = panel;
             
-            if (content.classList.contains('collapsed')) {{
-                content.classList.remove('collapsed');
-                button.classList.remove('collapsed');
-                button.textContent = '▼';
-                
-                // Load logit lens data if not already loaded
-                if (!content.dataset.loaded) {{
-                    loadLogitLensData(featureKey);
-                }}
-            }} else {{
-                content.classList.add('collapsed');
-                button.classList.add('collapsed');
-                button.textContent = '▶';
-            }}
-        }}
-        
-        async function loadLogitLensData(featureKey) {{
+            panel.expanded = !panel.expanded;
+            content.classList.toggle('collapsed', !panel.expanded);
+            button.classList.toggle('collapsed', !panel.expanded);
+            button.textContent = panel.expanded ? '▼' : '▶';
+            
+            // Load logit lens data on first expand (or after a failed load)
+            if (panel.expanded && !panel.loaded) {
+                content.innerHTML = '<div class="logit-lens-loading">Loading analysis...</div>';
+                loadLogitLensData(featureKey);
+            }
+        }
+        
+        function logitLensKey(feature) {
+            return feature.layer + '_' + feature.projection + '_' + feature.polarity;
+        }
+        
+        function requestLogitLensData(feature) {
+            // Cached data, or the one fetch in flight for the key; resolves to null
+            // when the API has no analysis for it
+            const cacheKey = logitLensKey(feature);
+            if (logitLensCache.has(cacheKey)) {
+                return Promise.resolve(logitLensCache.get(cacheKey));
+            }
+            let pending = logitLensInFlight.get(cacheKey);
+            if (!pending) {
+                pending = fetch(API_BASE + '/api/logit_lens/' + feature.layer + '/' + feature.projection + '/' + feature.polarity)
+                    .then(async (response) => {
+                        if (!response.ok) return null;
+                        const data = await response.json();
+                        logitLensCache.set(cacheKey, data);
+                        return data;
+                    })
+                    .finally(() => logitLensInFlight.delete(cacheKey));
+                logitLensInFlight.set(cacheKey, pending);
+            }
+            return pending;
+        }
+        
+        function prefetchLogitLensData(feature) {
+            // Background load; opening the panel later reuses the cached or in-flight result
+            requestLogitLensData(feature).catch(() => {}); // Errors resurface when the panel is opened
+        }
+        
+        async function loadLogitLensData(featureKey) {
             const feature = currentFeature;
             if (!feature) return;
             
-            const content = document.getElementById('logit-lens-content-' + featureKey);
-            const cacheKey = feature.layer + '_' + feature.projection + '_' + feature.polarity;
+            const panel = logitLensPanels.get(featureKey);
+            if (!panel) return;
+            const content = panel.content;
             
-            // Check cache first
-            if (logitLensCache[cacheKey]) {{
-                displayLogitLensData(featureKey, logitLensCache[cacheKey]);
-                content.dataset.loaded = 'true';
-                return;
-            }}
-            
-            try {{
-                const response = await fetch(API_BASE + '/api/logit_lens/' + feature.layer + '/' + feature.projection + '/' + feature.polarity);
-                if (response.ok) {{
-                    const data = await response.json();
-                    logitLensCache[cacheKey] = data;
+            try {
+                const data = await requestLogitLensData(feature);
+                if (logitLensPanels.get(featureKey) !== panel) return; // Another feature is displayed now
+                if (data) {
                     displayLogitLensData(featureKey, data);
-                    content.dataset.loaded = 'true';
-                }} else {{
+                    panel.loaded = true;
+                } else {
                     content.innerHTML = '<div class="logit-lens-loading">No logit lens data available</div>';
-                }}
-            }} catch (error) {{
+                }
+            } catch (error) {
                 console.error('Failed to load logit lens data:', error);
                 content.innerHTML = '<div class="logit-lens-loading">Error loading analysis</div>';
-            }}
-        }}
+            }
+        }
         
-        function displayLogitLensData(featureKey, data) {{
-            const content = document.getElementById('logit-lens-content-' + featureKey);
+        function displayLogitLensData(featureKey, data) {
+            const content = logitLensPanels.get(featureKey).content;
             const analysisType = data.analysis_type;
             const projection = data.projection;
             
-            let html = '';
+            // Built as nodes, so token text needs no escaping and no HTML is parsed
+            const fragment = document.createDocumentFragment();
             
             // Determine titles and colors based on analysis type and polarity
             let posTitle, negTitle, posClass, negClass;
             
-            if (analysisType === 'output') {{
+            if (analysisType === 'output') {
                 // down_proj: output tokens
                 posTitle = 'Tokens this feature promotes:';
                 negTitle = 'Tokens this feature suppresses:';
                 posClass = 'positive';
                 negClass = 'negative';
-            }} else {{
+            } else {
                 // gate/up_proj: input tokens
                 posTitle = 'Tokens that activate this feature:';
                 negTitle = 'Tokens that inhibit this feature:';
                 posClass = 'activating';
                 negClass = 'inhibiting';
-            }}
+            }
             
-            // Show positive tokens
-            if (data.tokens && data.tokens.length > 0) {{
-                const positiveTokens = data.polarity === 'positive' ? data.tokens : [];
-                const negativeTokens = data.polarity === 'negative' ? data.tokens : [];
-                
-                if (positiveTokens.length > 0) {{
-                    html += '<div class="logit-lens-group">';
-                    html += '<div class="logit-lens-group-title">' + posTitle + '</div>';
-                    html += displayTokenList(positiveTokens, posClass);
-                    html += '</div>';
-                }}
-                
-                if (negativeTokens.length > 0) {{
-                    html += '<div class="logit-lens-group">';
-                    html += '<div class="logit-lens-group-title">' + negTitle + '</div>';
-                    html += displayTokenList(negativeTokens, negClass);
-                    html += '</div>';
-                }}
-            }} else {{
-                html = '<div class="logit-lens-loading">No significant tokens found</div>';
-            }}
-            
-            content.innerHTML = html;
-        }}
-        
-        function displayTokenList(tokens, colorClass) {{
-            let html = '';
-            
-            // Find max value for scaling bars
-            const maxValue = Math.max(...tokens.map(t => Math.abs(t.value)));
-            
-            tokens.forEach(token => {{
-                const value = token.value;
-                const absValue = Math.abs(value);
-                const barWidth = (absValue / maxValue) * 100;
+            // tokens, values and barPct are parallel arrays
+            if (data.tokens && data.tokens.length > 0) {
+                if (data.polarity === 'positive') {
+                    fragment.appendChild(buildTokenGroup(posTitle, data, posClass));
+                } else if (data.polarity === 'negative') {
+                    fragment.appendChild(buildTokenGroup(negTitle, data, negClass));
+                }
+            } else {
+                fragment.appendChild(createElement('div', 'logit-lens-loading', 'No significant tokens found'));
+            }
+            
+            content.replaceChildren(fragment);
+        }
+        
+        function buildTokenGroup(title, data, colorClass) {
+            const group = createElement('div', 'logit-lens-group');
+            group.appendChild(createElement('div', 'logit-lens-group-title', title));
+            group.appendChild(displayTokenList(data.tokens, data.values, data.barPct, colorClass));
+            return group;
+        }
+        
+        function displayTokenList(tokens, values, barPct, colorClass) {
+            // Bar widths come pre-scaled from the API (whole % of the largest |value|)
+            const fragment = document.createDocumentFragment();
+            for (let i = 0; i < tokens.length; i++) {
+                const token = tokens[i];
+                const value = values[i];
                 
                 // Format token for display
-                let displayToken = token.token;
-                if (displayToken.startsWith(' ')) {{
+                let displayToken = token;
+                if (displayToken.startsWith(' ')) {
                     displayToken = '▁' + displayToken.slice(1); // Use underscore to show space
-                }}
-                displayToken = displayToken.replace(/\\n/g, '\\\\n');
+                }
+                if (displayToken.indexOf('\\n') >= 0) {
+                    displayToken = displayToken.split('\\n').join('\\\\n');
+                }
                 
-                html += '<div class="token-entry">';
-                html += '<span class="token-text" title="' + token.token.replace(/"/g, '&quot;') + '">' + displayToken + '</span>';
-                html += '<span class="token-value">' + value.toFixed(2) + '</span>';
-                html += '<div class="token-bar">';
-                html += '<div class="token-bar-fill ' + colorClass + '" style="width: ' + barWidth + '%;"></div>';
-                html += '</div>';
-                html += '</div>';
-            }});
+                const entry = createElement('div', 'token-entry');
+                const text = createElement('span', 'token-text', displayToken);
+                text.title = token;
+                entry.appendChild(text);
+                // toFixed rather than a cached Intl.NumberFormat: same output, several times faster in V8
+                entry.appendChild(createElement('span', 'token-value', value.toFixed(2)));
+                const bar = createElement('div', 'token-bar');
+                const fill = createElement('div', 'token-bar-fill ' + colorClass);
+                fill.style.width = barPct[i] + '%';
+                bar.appendChild(fill);
+                entry.appendChild(bar);
+                fragment.appendChild(entry);
+            }
             
-            return html;
-        }}
-        
-        // Keyboard shortcuts
-        document.addEventListener('keydown', (e) => {{
-            if (e.ctrlKey || e.metaKey) {{
-                if (e.key === 'Enter') {{
-                    e.preventDefault();
-                    nextFeature();
-                }} else if (e.key === 's') {{
-                    e.preventDefault();
-                    skipFeature();
-                }}
-            }}
-        }});
+            return fragment;
+        }
+        
+        // Keyboard shortcuts. Every keystroke typed into the interpretation box lands
+        // here, so plain keys leave before anything else is read. Not passive, since
+        // the shortcuts must preventDefault (Ctrl+S would otherwise save the page).
+        document.addEventListener('keydown', (e) => {
+            if (!(e.ctrlKey || e.metaKey)) return;
+            const key = e.key;
+            if (key !== 'Enter' && key !== 's') return;
+            
+            e.preventDefault();
+            if (key === 'Enter') {
+                nextFeature();
+            } else {
+                skipFeature();
+            }
+        });
     </script>
 </body>
 </html>"""
     
-    # Format the HTML with data
-    html_content = html_content.replace('{features_json}', json.dumps(all_features))
-    html_content = html_content.replace('{total_features}', str(total_features))
+    cache_version = datetime.now().strftime('%Y%m%d%H%M%S')
+    placeholders = {
+        '@@CACHE_VERSION@@': cache_version,
+        '@@PALETTE_CSS@@': palette_css(),
+        '@@COLOR_BUCKETS@@': str(COLOR_BUCKETS),
+        '@@MAX_BG_ALPHA@@': str(MAX_BG_ALPHA),
+        '@@TOTAL_FEATURES@@': str(total_features),
+        '@@FEATURES_JSON@@': json_dumps(all_features, finite),
+    }
     
     # Write to file
     print(f"Writing dashboard to {output_path}...")
     with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(html_content)
+        for part in re.split(r'(@@[A-Z_]+@@)', html_template):
+            f.write(placeholders.get(part, part))
+    
+    # The service worker must be served from the dashboard's own directory
+    sw_path = os.path.join(os.path.dirname(output_path), SERVICE_WORKER_FILENAME)
+    with open(sw_path, 'w', encoding='utf-8') as f:
+        f.write(SERVICE_WORKER_JS.replace('@@CACHE_VERSION@@', cache_version))
     
     print(f"Dashboard generated successfully!")
     print(f"Total features: {total_features}")
@@ -9,7 +9,7 @@ import torch
 import torch.nn.functional as F
 import json
 import numpy as np
-from transformers import AutoModelForCausalLM, AutoTokenizer
+from transformers import AutoModelForCausalLM, AutoTokenizer, StoppingCriteria, StoppingCriteriaList
 from peft import PeftModel
 from datasets import load_dataset
 import glob
@@ -18,6 +18,8 @@ import random
 import gc
 import h5py
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # %% [markdown]
@@ -40,7 +42,12 @@ NUM_SENTENCES_PREFIX = 5  # Generate 5 sentences as prefix
 
 # Paths
 ACTIVATIONS_DIR = "/workspace/lora-activations-dashboard/backend/activations"
-MEDIAN_CACHE_PATH = "/workspace/lora-activations-dashboard/median_activations_cache.json"
+MEDIAN_CACHE_PATH = "/workspace/lora-activations-dashboard/activation_stats_cache.npz"  # Medians and LoRA activation stats
+H5_CHUNK_CACHE_BYTES = 64 * 1024 * 1024  # HDF5 raw chunk cache per open activation file
+# Threads scanning activation files. h5py serializes every HDF5 call behind one global
+# lock, so reads never run in parallel; a second thread only lets one file's NumPy
+# masking overlap the next file's read. Each open file also holds its own chunk cache.
+SCAN_WORKERS = 2
 
 # %% [markdown]
 # ## Load Model and Dataset
@@ -83,7 +90,8 @@ def extract_lora_directions(model):
     """Extract LoRA A and B matrices for all layers and projections"""
     lora_A_directions = {'gate_proj': {}, 'up_proj': {}, 'down_proj': {}}
     lora_B_directions = {'gate_proj': {}, 'up_proj': {}, 'down_proj': {}}
-    lora_layers = set()
+    lora_layers = []  # Ascending, since layers are visited in order
+    adapter_dtypes = set()
     
     n_layers = model.config.num_hidden_layers
     
@@ -92,17 +100,32 @@ def extract_lora_directions(model):
             module = model.model.model.layers[layer_idx].mlp.__getattr__(proj_type)
             
             if hasattr(module, 'lora_A') and hasattr(module, 'lora_B'):
+                # PEFT may upcast adapter weights to float32; both directions are kept in
+                # the base projection's dtype (bf16), so a steering add moves half the bytes
+                base_weight = module.get_base_layer().weight
+                adapter_dtypes.add(module.lora_B['default'].weight.dtype)
+                
                 # Extract A matrix (read direction)
                 lora_A_weight = module.lora_A['default'].weight.data
-                lora_A_directions[proj_type][layer_idx] = lora_A_weight.squeeze()
+                lora_A_directions[proj_type][layer_idx] = lora_A_weight.squeeze().to(dtype=base_weight.dtype)
                 
-                # Extract B matrix (write direction)
+                # Extract B matrix (write direction), stored contiguous in the projection's
+                # output dtype on its device (the layer's shard under device_map="auto")
+                # so steering never converts or copies it
                 lora_B_weight = module.lora_B['default'].weight.data
-                lora_B_directions[proj_type][layer_idx] = lora_B_weight.squeeze()
+                lora_B_directions[proj_type][layer_idx] = lora_B_weight.squeeze().to(
+                    dtype=base_weight.dtype, device=base_weight.device
+                ).contiguous()
                 
-                lora_layers.add(layer_idx)
+                # Record each layer once, on its first adapted projection
+                if not lora_layers or lora_layers[-1] != layer_idx:
+                    lora_layers.append(layer_idx)
+    
+    if adapter_dtypes:
+        print(f"LoRA adapter dtype: {', '.join(sorted(str(dtype) for dtype in adapter_dtypes))} "
+              "(directions cast to the base projection dtype)")
     
-    return lora_A_directions, lora_B_directions, sorted(list(lora_layers))
+    return lora_A_directions, lora_B_directions, lora_layers
 
 # Extract directions
 print("Extracting LoRA directions...")
@@ -110,86 +133,201 @@ lora_A_directions, lora_B_directions, lora_layers = extract_lora_directions(mode
 print(f"Found LoRA adapters in {len(lora_layers)} layers")
 
 # %% [markdown]
-# ## Compute Median Non-Zero Activations
+# ## Compute Median Non-Zero Activations and Statistics
 
 # %%
+def read_activations(h5_path, buffer=None):
+    """
+    Read a rollout's activations into a reusable buffer, growing it as needed.
+    
+    Returns (activations, buffer) where activations is a view of the first
+    num_tokens rows of buffer, shape [num_tokens, num_layers, 3].
+    """
+    with h5py.File(h5_path, 'r', rdcc_nbytes=H5_CHUNK_CACHE_BYTES) as f:
+        dataset = f['activations']
+        num_tokens = dataset.shape[0]
+        fits = (buffer is not None and buffer.shape[0] >= num_tokens
+                and buffer.shape[1:] == dataset.shape[1:] and buffer.dtype == dataset.dtype)
+        if not fits:
+            buffer = np.empty(dataset.shape, dtype=dataset.dtype)
+        dataset.read_direct(buffer, dest_sel=np.s_[:num_tokens])
+    return buffer[:num_tokens], buffer
+
+_scan_buffers = threading.local()  # One read buffer per scanning thread
+
+def scan_file(h5_path, lora_layers):
+    """
+    Split one rollout's activations into non-zero values per feature.
+    
+    Returns a dict: {(layer_idx, proj_type, polarity): float32 array}, with
+    negative activations as absolute values. Empty splits are omitted.
+    """
+    activations, _scan_buffers.buffer = read_activations(h5_path, getattr(_scan_buffers, 'buffer', None))
+    
+    # [num_layers, 3, num_tokens]: each feature's activations become one contiguous row,
+    # and the sign masks and magnitudes are computed for all features at once
+    by_feature = np.ascontiguousarray(np.moveaxis(activations, 0, -1), dtype=np.float32)
+    positive_mask = by_feature > 0
+    negative_mask = by_feature < 0
+    magnitudes = np.abs(by_feature)
+    
+    splits = {}
+    for layer_idx_pos, layer_idx in enumerate(lora_layers):
+        for proj_idx, proj_type in enumerate(['gate_proj', 'up_proj', 'down_proj']):
+            # Separate positive and negative non-zero activations
+            positive_acts = by_feature[layer_idx_pos, proj_idx][positive_mask[layer_idx_pos, proj_idx]]
+            negative_acts = magnitudes[layer_idx_pos, proj_idx][negative_mask[layer_idx_pos, proj_idx]]
+            
+            if len(positive_acts) > 0:
+                splits[(layer_idx, proj_type, 'positive')] = positive_acts
+            if len(negative_acts) > 0:
+                splits[(layer_idx, proj_type, 'negative')] = negative_acts
+    
+    return splits
+
+def update_moments(moments, acts):
+    """Fold a chunk into running {'count', 'mean', 'm2'} moments (Welford, merged per chunk)"""
+    chunk_count = len(acts)
+    chunk_mean = float(acts.mean(dtype=np.float64))
+    chunk_m2 = float(np.square(acts - chunk_mean, dtype=np.float64).sum())
+    
+    count = moments['count'] + chunk_count
+    delta = chunk_mean - moments['mean']
+    moments['mean'] += delta * chunk_count / count
+    moments['m2'] += chunk_m2 + delta * delta * moments['count'] * chunk_count / count
+    moments['count'] = count
+
+def scan_activation_files(h5_files, lora_layers):
+    """
+    Scan activation files on SCAN_WORKERS threads and gather the per-file splits from scan_file.
+    
+    Returns (activations_by_feature, moments_by_feature):
+        activations_by_feature: {layer_idx: {proj_type: {polarity: [float32 arrays]}}}
+        moments_by_feature: {layer_idx: {proj_type: {polarity: {'count', 'mean', 'm2'}}}}
+    """
+    proj_types = ['gate_proj', 'up_proj', 'down_proj']
+    activations_by_feature = {
+        layer_idx: {proj: {'positive': [], 'negative': []} for proj in proj_types}
+        for layer_idx in lora_layers
+    }
+    moments_by_feature = {
+        layer_idx: {
+            proj: {polarity: {'count': 0, 'mean': 0.0, 'm2': 0.0} for polarity in ['positive', 'negative']}
+            for proj in proj_types
+        }
+        for layer_idx in lora_layers
+    }
+    
+    with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as executor:
+        splits_per_file = executor.map(lambda h5_path: scan_file(h5_path, lora_layers), h5_files)
+        for splits in tqdm(splits_per_file, total=len(h5_files), desc="Processing activation files"):
+            # Keep per-file chunks as arrays (the median needs them all); mean/std are running
+            for (layer_idx, proj_type, polarity), acts in splits.items():
+                activations_by_feature[layer_idx][proj_type][polarity].append(acts)
+                update_moments(moments_by_feature[layer_idx][proj_type][polarity], acts)
+    
+    return activations_by_feature, moments_by_feature
+
+STAT_NAMES = ['std', 'mean', 'median']
+
+def save_activation_stats(cache_path, lora_layers, median_activations, lora_stats):
+    """Save medians and stats as [n_layers, 3] arrays (one per polarity and statistic) in an .npz"""
+    proj_types = ['gate_proj', 'up_proj', 'down_proj']
+    arrays = {'layers': np.array(lora_layers, dtype=np.int64)}
+    for polarity in ['positive', 'negative']:
+        arrays[f'median_{polarity}'] = np.array(
+            [[median_activations[layer_idx][proj][polarity] for proj in proj_types] for layer_idx in lora_layers]
+        )
+        for stat in STAT_NAMES:
+            arrays[f'{stat}_{polarity}'] = np.array(
+                [[lora_stats[layer_idx][proj][polarity][stat] for proj in proj_types] for layer_idx in lora_layers]
+            )
+    np.savez_compressed(cache_path, **arrays)
+
+def load_activation_stats(cache_path):
+    """Inverse of save_activation_stats; returns (median_activations, lora_stats)"""
+    proj_types = ['gate_proj', 'up_proj', 'down_proj']
+    with np.load(cache_path) as cache:
+        arrays = {name: cache[name].tolist() for name in cache.files}
+    
+    median_activations = {}
+    lora_stats = {}
+    for i, layer_idx in enumerate(arrays['layers']):
+        median_activations[layer_idx] = {}
+        lora_stats[layer_idx] = {}
+        for j, proj in enumerate(proj_types):
+            median_activations[layer_idx][proj] = {}
+            lora_stats[layer_idx][proj] = {}
+            for polarity in ['positive', 'negative']:
+                median_activations[layer_idx][proj][polarity] = arrays[f'median_{polarity}'][i][j]
+                lora_stats[layer_idx][proj][polarity] = {stat: arrays[f'{stat}_{polarity}'][i][j] for stat in STAT_NAMES}
+    
+    return median_activations, lora_stats
+
 def compute_median_nonzero_activations(activations_dir, lora_layers, cache_path=None):
     """
-    Compute median non-zero activations for each feature from HDF5 files.
+    Compute median non-zero activations and LoRA activation statistics for
+    each feature in a single pass over the HDF5 files. The statistics allow
+    steering strength to be measured in units of standard deviations.
     
-    Returns a dict: {layer_idx: {proj_type: {polarity: median_value}}}
+    Returns (median_activations, lora_stats):
+        median_activations: {layer_idx: {proj_type: {polarity: median_value}}}
+        lora_stats: {layer_idx: {proj_type: {polarity: {'std', 'mean', 'median'}}}}
     """
     # Try to load from cache first
     if cache_path and os.path.exists(cache_path):
-        print(f"Loading cached median activations from {cache_path}")
-        with open(cache_path, 'r') as f:
-            return json.load(f, object_hook=lambda d: {int(k) if k.isdigit() else k: v for k, v in d.items()})
+        print(f"Loading cached median activations and LoRA activation stats from {cache_path}")
+        return load_activation_stats(cache_path)
     
     # Check if activation files exist
     h5_files = glob.glob(os.path.join(activations_dir, "rollout_*.h5"))
     if not h5_files:
         raise FileNotFoundError(f"No activation files found in {activations_dir}. Please run generate_activations_data.py first.")
     
-    print(f"Computing median non-zero activations from {len(h5_files)} files...")
+    print(f"Computing median non-zero activations and LoRA activation statistics from {len(h5_files)} files...")
     
-    # Initialize storage
-    activations_by_feature = {}
+    # Process each file (first 100 for efficiency), several at a time
+    activations_by_feature, moments_by_feature = scan_activation_files(h5_files[:100], lora_layers)
     proj_types = ['gate_proj', 'up_proj', 'down_proj']
     
-    # Process each file
-    for h5_path in tqdm(h5_files[:100], desc="Processing activation files"):  # Use first 100 files for efficiency
-        with h5py.File(h5_path, 'r') as f:
-            # activations shape: [num_tokens, num_layers, 3]
-            activations = f['activations'][:]
-            
-            for layer_idx_pos, layer_idx in enumerate(lora_layers):
-                if layer_idx not in activations_by_feature:
-                    activations_by_feature[layer_idx] = {proj: {'positive': [], 'negative': []} for proj in proj_types}
-                
-                for proj_idx, proj_type in enumerate(proj_types):
-                    layer_activations = activations[:, layer_idx_pos, proj_idx]
-                    
-                    # Separate positive and negative non-zero activations
-                    positive_acts = layer_activations[layer_activations > 0]
-                    negative_acts = layer_activations[layer_activations < 0]
-                    
-                    if len(positive_acts) > 0:
-                        activations_by_feature[layer_idx][proj_type]['positive'].extend(positive_acts.tolist())
-                    if len(negative_acts) > 0:
-                        activations_by_feature[layer_idx][proj_type]['negative'].extend(negative_acts.tolist())
-    
-    # Compute medians
+    # Compute medians and statistics (negative values are absolute, i.e. magnitudes)
     median_activations = {}
+    lora_stats = {}
     for layer_idx in lora_layers:
         median_activations[layer_idx] = {}
+        lora_stats[layer_idx] = {}
         for proj_type in proj_types:
             median_activations[layer_idx][proj_type] = {}
+            lora_stats[layer_idx][proj_type] = {}
             
-            # Positive median
-            pos_acts = activations_by_feature[layer_idx][proj_type]['positive']
-            if pos_acts:
-                median_activations[layer_idx][proj_type]['positive'] = float(np.median(pos_acts))
-            else:
-                median_activations[layer_idx][proj_type]['positive'] = 1.0  # Default if no positive activations
-            
-            # Negative median (store as positive value for magnitude)
-            neg_acts = activations_by_feature[layer_idx][proj_type]['negative']
-            if neg_acts:
-                median_activations[layer_idx][proj_type]['negative'] = float(np.median(np.abs(neg_acts)))
-            else:
-                median_activations[layer_idx][proj_type]['negative'] = 1.0  # Default if no negative activations
+            for polarity in ['positive', 'negative']:
+                chunks = activations_by_feature[layer_idx][proj_type][polarity]
+                moments = moments_by_feature[layer_idx][proj_type][polarity]
+                
+                # Default to 1.0 if there are no activations of this polarity. The concatenated
+                # array is a temporary, so let np.median partition it in place rather than copy it
+                median = float(np.median(np.concatenate(chunks), overwrite_input=True)) if chunks else 1.0
+                median_activations[layer_idx][proj_type][polarity] = median
+                
+                if moments['count'] > 1:
+                    lora_stats[layer_idx][proj_type][polarity] = {
+                        'std': float(np.sqrt(moments['m2'] / moments['count'])),
+                        'mean': moments['mean'],
+                        'median': median
+                    }
+                else:
+                    lora_stats[layer_idx][proj_type][polarity] = {'std': 1.0, 'mean': 1.0, 'median': 1.0}
     
     # Save cache
     if cache_path:
-        print(f"Saving median activations cache to {cache_path}")
-        with open(cache_path, 'w') as f:
-            json.dump(median_activations, f, indent=2)
+        print(f"Saving median activations and LoRA activation stats cache to {cache_path}")
+        save_activation_stats(cache_path, lora_layers, median_activations, lora_stats)
     
-    return median_activations
+    return median_activations, lora_stats
 
-# Compute median activations
-print("\nComputing median non-zero activations...")
-median_activations = compute_median_nonzero_activations(ACTIVATIONS_DIR, lora_layers, MEDIAN_CACHE_PATH)
+# Compute median activations and LoRA activation statistics
+print("\nComputing median non-zero activations and LoRA activation statistics...")
+median_activations, lora_stats = compute_median_nonzero_activations(ACTIVATIONS_DIR, lora_layers, MEDIAN_CACHE_PATH)
 
 # Print some examples
 print("\nExample median activations:")
@@ -201,108 +339,9 @@ for layer_idx in lora_layers[:3]:
         print(f"  {proj_type}: positive={pos_med:.4f}, negative={neg_med:.4f}")
 
 # %% [markdown]
-# ## Select a Random Prompt
+# ## LoRA Activation Statistics
 
 # %%
-# Select a random prompt from the dataset
-random_idx = random.randint(0, len(dataset) - 1)
-selected_prompt = dataset[random_idx]['question']
-print(f"Selected prompt (idx {random_idx}):")
-print(selected_prompt)
-
-# %% [markdown]
-# ## Compute Standard Deviations of LoRA Activations
-
-# %%
-def compute_lora_activation_stats(activations_dir, lora_layers, cache_path=None):
-    """
-    Compute standard deviations of LoRA activations for each feature.
-    This allows steering strength to be measured in units of standard deviations.
-    
-    Returns:
-        dict: {layer_idx: {proj_type: {"positive": stats, "negative": stats}}}
-    """
-    # Try to load from cache first
-    if cache_path and os.path.exists(cache_path):
-        print(f"Loading cached LoRA activation stats from {cache_path}")
-        with open(cache_path, 'r') as f:
-            return json.load(f, object_hook=lambda d: {int(k) if k.isdigit() else k: v for k, v in d.items()})
-    
-    # Check if activation files exist
-    h5_files = glob.glob(os.path.join(activations_dir, "rollout_*.h5"))
-    if not h5_files:
-        raise FileNotFoundError(f"No activation files found in {activations_dir}. Please run generate_activations_data.py first.")
-    
-    print(f"Computing LoRA activation statistics from {len(h5_files)} files...")
-    
-    # Initialize storage
-    activations_by_feature = {}
-    proj_types = ['gate_proj', 'up_proj', 'down_proj']
-    
-    # Process each file
-    for h5_path in tqdm(h5_files[:100], desc="Processing activation files"):  # Use first 100 files
-        with h5py.File(h5_path, 'r') as f:
-            # activations shape: [num_tokens, num_layers, 3]
-            activations = f['activations'][:]
-            
-            for layer_idx_pos, layer_idx in enumerate(lora_layers):
-                if layer_idx not in activations_by_feature:
-                    activations_by_feature[layer_idx] = {proj: {'positive': [], 'negative': []} for proj in proj_types}
-                
-                for proj_idx, proj_type in enumerate(proj_types):
-                    layer_activations = activations[:, layer_idx_pos, proj_idx]
-                    
-                    # Collect all non-zero activations
-                    positive_acts = layer_activations[layer_activations > 0]
-                    negative_acts = layer_activations[layer_activations < 0]
-                    
-                    if len(positive_acts) > 0:
-                        activations_by_feature[layer_idx][proj_type]['positive'].extend(positive_acts.tolist())
-                    if len(negative_acts) > 0:
-                        activations_by_feature[layer_idx][proj_type]['negative'].extend(np.abs(negative_acts).tolist())
-    
-    # Compute statistics
-    lora_stats = {}
-    for layer_idx in lora_layers:
-        lora_stats[layer_idx] = {}
-        for proj_type in proj_types:
-            lora_stats[layer_idx][proj_type] = {}
-            
-            # Positive stats
-            pos_acts = activations_by_feature[layer_idx][proj_type]['positive']
-            if pos_acts and len(pos_acts) > 1:
-                lora_stats[layer_idx][proj_type]['positive'] = {
-                    'std': float(np.std(pos_acts)),
-                    'mean': float(np.mean(pos_acts)),
-                    'median': float(np.median(pos_acts))
-                }
-            else:
-                lora_stats[layer_idx][proj_type]['positive'] = {'std': 1.0, 'mean': 1.0, 'median': 1.0}
-            
-            # Negative stats (using absolute values)
-            neg_acts = activations_by_feature[layer_idx][proj_type]['negative']
-            if neg_acts and len(neg_acts) > 1:
-                lora_stats[layer_idx][proj_type]['negative'] = {
-                    'std': float(np.std(neg_acts)),
-                    'mean': float(np.mean(neg_acts)),
-                    'median': float(np.median(neg_acts))
-                }
-            else:
-                lora_stats[layer_idx][proj_type]['negative'] = {'std': 1.0, 'mean': 1.0, 'median': 1.0}
-    
-    # Save cache
-    if cache_path:
-        print(f"Saving LoRA activation stats to {cache_path}")
-        with open(cache_path, 'w') as f:
-            json.dump(lora_stats, f, indent=2)
-    
-    return lora_stats
-
-# Compute LoRA activation statistics
-print("\nComputing LoRA activation statistics...")
-lora_stats = compute_lora_activation_stats(ACTIVATIONS_DIR, lora_layers, 
-                                          "/workspace/lora-activations-dashboard/lora_activation_stats_cache.json")
-
 # Print some examples
 print("\nExample LoRA activation statistics:")
 for layer_idx in lora_layers[:3]:
@@ -314,17 +353,64 @@ for layer_idx in lora_layers[:3]:
         print(f"    Positive: median={pos_stats['median']:.4f}, std={pos_stats['std']:.4f}")
         print(f"    Negative: median={neg_stats['median']:.4f}, std={neg_stats['std']:.4f}")
 
+# %% [markdown]
+# ## Select a Random Prompt
+
+# %%
+# Select a random prompt from the dataset
+random_idx = random.randint(0, len(dataset) - 1)
+selected_prompt = dataset[random_idx]['question']
+print(f"Selected prompt (idx {random_idx}):")
+print(selected_prompt)
+
 # %% [markdown]
 # ## Generate Prefix Without Steering
 
 # %%
-def count_sentences(text):
-    """Simple sentence counter based on common punctuation"""
-    import re
-    # Count sentences ending with ., !, or ?
-    sentences = re.split(r'[.!?]+', text)
-    # Filter out empty strings and count
-    return len([s for s in sentences if s.strip()])
+class SentenceCountCriteria(StoppingCriteria):
+    """Stop once the generated text has target sentences and the current one has ended
+    
+    After the count is reached, generation continues for up to look_ahead tokens
+    until a token that is itself sentence-ending punctuation.
+    
+    Only the newest token is decoded at each step, and the sentence count is kept
+    incrementally: a sentence is a run of text between sentence-ending punctuation
+    (., ! or ?) that is not all whitespace.
+    """
+    def __init__(self, tokenizer, prompt_len, target, look_ahead=50):
+        self.tokenizer = tokenizer
+        self.prompt_len = prompt_len
+        self.target = target
+        self.look_ahead = look_ahead
+        self.num_generated = 0
+        self.num_sentences = 0  # Completed sentences seen so far
+        self.in_sentence = False  # Whether the current sentence has non-whitespace text yet
+        self.reached_at = None  # Generated length when the sentence count was reached
+    
+    def add_piece(self, piece):
+        """Fold newly decoded text into the running sentence count"""
+        for char in piece:
+            if char in '.!?':
+                self.num_sentences += self.in_sentence
+                self.in_sentence = False
+            elif not char.isspace():
+                self.in_sentence = True
+    
+    def __call__(self, input_ids, scores, **kwargs):
+        # Generation only appends, so decode just the tokens added since the last call
+        new_ids = input_ids[0, self.prompt_len + self.num_generated:].tolist()
+        self.num_generated += len(new_ids)
+        new_piece = self.tokenizer.decode(new_ids)
+        
+        if self.reached_at is None:
+            self.add_piece(new_piece)
+            if self.num_sentences + self.in_sentence < self.target:
+                return torch.zeros(input_ids.shape[0], dtype=torch.bool, device=input_ids.device)
+            self.reached_at = self.num_generated
+        
+        done = (self.tokenizer.decode(new_ids[-1:]) in '.!?'
+                or self.num_generated - self.reached_at >= self.look_ahead)
+        return torch.full((input_ids.shape[0],), done, dtype=torch.bool, device=input_ids.device)
 
 def generate_prefix(model, tokenizer, prompt, num_sentences=5):
     """Generate a prefix with approximately num_sentences using greedy decoding"""
@@ -336,40 +422,24 @@ def generate_prefix(model, tokenizer, prompt, num_sentences=5):
     )
     
     inputs = tokenizer(full_prompt, return_tensors="pt").to(model.device)
+    prompt_len = len(inputs.input_ids[0])
     
-    # Generate token by token until we have enough sentences
-    generated_ids = inputs.input_ids[0].tolist()
-    
+    # Generate (with the KV cache) until we have enough sentences, then finish the current one
+    criterion = SentenceCountCriteria(tokenizer, prompt_len, num_sentences)
     with torch.no_grad():
-        for _ in range(500):  # Max tokens to prevent infinite loop
-            input_tensor = torch.tensor([generated_ids]).to(model.device)
-            
-            outputs = model(input_tensor)
-            logits = outputs.logits[0, -1, :]
-            
-            # Greedy decoding: take the argmax
-            next_token = torch.argmax(logits).item()
-            
-            generated_ids.append(next_token)
-            
-            # Check if we have enough sentences
-            generated_text = tokenizer.decode(generated_ids[len(inputs.input_ids[0]):])
-            if count_sentences(generated_text) >= num_sentences:
-                # Find the end of the current sentence
-                for _ in range(50):  # Look ahead up to 50 tokens
-                    if tokenizer.decode([next_token]) in '.!?':
-                        break
-                    
-                    input_tensor = torch.tensor([generated_ids]).to(model.device)
-                    outputs = model(input_tensor)
-                    logits = outputs.logits[0, -1, :]
-                    next_token = torch.argmax(logits).item()
-                    generated_ids.append(next_token)
-                break
+        outputs = model.generate(
+            inputs.input_ids,
+            max_new_tokens=550,  # Max tokens to prevent infinite loop, plus the look-ahead
+            do_sample=False,  # Greedy decoding
+            stopping_criteria=StoppingCriteriaList([criterion]),
+            pad_token_id=tokenizer.pad_token_id,
+            use_cache=True,
+        )
+    generated_ids = outputs[0].tolist()
     
     # Return full prompt with generated prefix
     full_text = tokenizer.decode(generated_ids)
-    prefix_only = tokenizer.decode(generated_ids[len(inputs.input_ids[0]):])
+    prefix_only = tokenizer.decode(generated_ids[prompt_len:])
     
     return full_text, prefix_only
 
@@ -382,17 +452,48 @@ print(f"\nGenerated prefix:\n{prefix_only}")
 # ## Implement Steering Hooks
 
 # %%
-def create_steering_hooks(model, layer_idx, proj_type, polarity, magnitude, lora_B_directions, lora_stats):
-    """Create hooks for steering based on projection type and polarity
+class SteeredProj(torch.nn.Module):
+    """MLP projection that adds a fixed steering tensor to its output
+    
+    Swapped in for the projection instead of a forward hook: hooks are opaque to
+    torch.compile (a graph break per hooked module), while this is a plain forward.
+    """
+    def __init__(self, proj, steering):
+        super().__init__()
+        self.proj = proj
+        self.register_buffer('steering', steering, persistent=False)
+    
+    def forward(self, x):
+        output = self.proj(x)
+        # One broadcast in-place add of [batch, 1, dim] over [batch, seq_len, dim]: no
+        # per-row slicing and no temporary (safe in place, generation runs under no_grad)
+        output.add_(self.steering)
+        return output
+
+class SteeringHandle:
+    """Puts the original projection back on remove(), like a hook's RemovableHandle"""
+    def __init__(self, mlp, proj_type, proj):
+        self.mlp = mlp
+        self.proj_type = proj_type
+        self.proj = proj
+    
+    def remove(self):
+        setattr(self.mlp, self.proj_type, self.proj)
+
+def create_steering_hooks(model, layer_idx, proj_type, polarity, magnitudes, lora_B_directions, lora_stats):
+    """Install steering on a projection based on projection type and polarity
     
     Args:
         model: The model
         layer_idx: Layer index
         proj_type: 'gate_proj', 'up_proj', or 'down_proj'
         polarity: 1 for positive, -1 for negative
-        magnitude: Steering magnitude (already scaled by median activation)
+        magnitudes: Steering magnitudes (already scaled by median activation), one per
+            batch row, so several magnitudes can be generated in a single batch
         lora_B_directions: Dict of LoRA B matrices
         lora_stats: Dict of LoRA activation statistics for each layer
+    
+    Returns a list of handles; call remove() on each to restore the model.
     """
     hooks = []
     
@@ -401,34 +502,20 @@ def create_steering_hooks(model, layer_idx, proj_type, polarity, magnitude, lora
         return hooks
     
     lora_B = lora_B_directions[proj_type][layer_idx]
+    mlp = model.model.model.layers[layer_idx].mlp
+    module = getattr(mlp, proj_type)
     
-    # Apply polarity and magnitude (no additional scaling)
-    steering_vector = lora_B * polarity * magnitude
+    # Apply polarity and magnitude (no additional scaling). The product is taken in
+    # float32, since bf16 magnitudes would keep only ~3 significant digits, and cast
+    # once to lora_B's dtype, which is the projection's output dtype on its device
+    scales = polarity * torch.tensor(magnitudes, dtype=torch.float32, device=lora_B.device)
+    # [batch, 1, dim]: row i is steered by magnitudes[i] at every position
+    steering_vectors = (scales[:, None, None] * lora_B.float()[None, None, :]).to(lora_B.dtype)
     
-    if proj_type in ['gate_proj', 'up_proj']:
-        # For gate_proj and up_proj, we add to the output of the projection
-        # This affects the MLP hidden state
-        module = model.model.model.layers[layer_idx].mlp.__getattr__(proj_type)
-        
-        def mlp_steering_hook(module, input, output):
-            # output shape: [batch, seq_len, hidden_dim]
-            output[0, :, :] = output[0, :, :] + steering_vector.to(output.dtype).to(output.device)
-            return output
-        
-        hook = module.register_forward_hook(mlp_steering_hook)
-        hooks.append(hook)
-        
-    elif proj_type == 'down_proj':
-        # For down_proj, we add to the output of down_proj (which goes to residual stream)
-        module = model.model.model.layers[layer_idx].mlp.down_proj
-        
-        def residual_steering_hook(module, input, output):
-            # output shape: [batch, seq_len, model_dim]
-            output[0, :, :] = output[0, :, :] + steering_vector.to(output.dtype).to(output.device)
-            return output
-        
-        hook = module.register_forward_hook(residual_steering_hook)
-        hooks.append(hook)
+    # For gate_proj and up_proj this adds to the MLP hidden state; for down_proj
+    # it adds to the MLP output, which goes to the residual stream
+    setattr(mlp, proj_type, SteeredProj(module, steering_vectors))
+    hooks.append(SteeringHandle(mlp, proj_type, module))
     
     return hooks
 
@@ -458,6 +545,10 @@ TEST_FEATURES = [
 
 all_test_results = {}
 
+# Tokenize the prefix once; it is the same for every steering configuration
+prefix_inputs = tokenizer(prefix_with_prompt, return_tensors="pt").to(model.device)
+prefix_len = len(prefix_inputs.input_ids[0])
+
 # Test each feature
 for test_layer, test_proj in TEST_FEATURES:
     feature_key = f"layer_{test_layer}_{test_proj}"
@@ -479,43 +570,42 @@ for test_layer, test_proj in TEST_FEATURES:
         print(f"Median non-zero activation: {median_act:.4f}")
         print("Generating with different magnitudes...")
         
+        # Calculate magnitudes based on median activation
+        magnitudes = [multiplier * median_act for multiplier in STEERING_MULTIPLIERS]
+        
+        # Register steering hooks, one magnitude per batch row
+        hooks = create_steering_hooks(model, test_layer, test_proj, test_polarity, magnitudes, lora_B_directions, lora_stats)
+        
+        # Generate all magnitudes in one batch with greedy decoding
+        with torch.no_grad():
+            outputs = model.generate(
+                prefix_inputs.input_ids.repeat(len(magnitudes), 1),
+                max_new_tokens=MAX_NEW_TOKENS,
+                do_sample=False,  # Greedy decoding
+                pad_token_id=tokenizer.pad_token_id,
+            )
+        
+        # Remove hooks
+        for hook in hooks:
+            hook.remove()
+        
         test_results = {}
         
-        for multiplier in STEERING_MULTIPLIERS:
-            # Calculate magnitude based on median activation
-            magnitude = multiplier * median_act
+        for row, (multiplier, magnitude) in enumerate(zip(STEERING_MULTIPLIERS, magnitudes)):
             print(f"\nMultiplier {multiplier}x (magnitude={magnitude:.4f}):")
             
-            # Register steering hooks
-            hooks = create_steering_hooks(model, test_layer, test_proj, test_polarity, magnitude, lora_B_directions, lora_stats)
-            
-            # Tokenize the prefix
-            inputs = tokenizer(prefix_with_prompt, return_tensors="pt").to(model.device)
-            
-            # Generate with greedy decoding
-            with torch.no_grad():
-                outputs = model.generate(
-                    inputs.input_ids,
-                    max_new_tokens=MAX_NEW_TOKENS,
-                    do_sample=False,  # Greedy decoding
-                    pad_token_id=tokenizer.pad_token_id,
-                )
-            
-            # Remove hooks
-            for hook in hooks:
-                hook.remove()
-            
             # Decode and store
-            generated_text = tokenizer.decode(outputs[0][len(inputs.input_ids[0]):], skip_special_tokens=True)
+            generated_text = tokenizer.decode(outputs[row][prefix_len:], skip_special_tokens=True)
             test_results[multiplier] = generated_text
             
             print(generated_text[:100] + "..." if len(generated_text) > 100 else generated_text)
-            
-            # Clear GPU memory
-            torch.cuda.empty_cache()
-            gc.collect()
         
         all_test_results[feature_key][polarity_name] = test_results
+    
+    # Clear GPU memory once per feature; the caching allocator reuses blocks between batches,
+    # and emptying it (or a full gc sweep) after every generate only adds syncs
+    torch.cuda.empty_cache()
+    gc.collect()
 
 # %% [markdown]
 # ## Analyze Results
@@ -0,0 +1,55 @@
+import json
+import math
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import generate_interpretation_dashboard as dashboard
+
+
+def write_activation_data(path, activation=1.5):
+    example = {
+        'rollout_idx': 0,
+        'token_idx': 1,
+        'activation': activation,
+        'context': ['a', 'b'],
+        'target_position': 1,
+        'context_activations': [0.1, 1.5],
+    }
+    layer = {'layerIdx': 0}
+    for proj_type in dashboard.PROJ_TYPES:
+        layer[proj_type] = {
+            'topPositive': [example],
+            'topNegative': [example],
+            # json.dump writes these for features that never fired
+            'stats': {'min': float('inf'), 'max': float('-inf')},
+        }
+    with open(path, 'w') as f:
+        json.dump({'metadata': {}, 'layers': [layer]}, f)
+
+
+def test_load_json_file_accepts_infinity(tmp_path):
+    data_path = tmp_path / 'activations_data.json'
+    write_activation_data(data_path)
+    
+    data = dashboard.load_json_file(data_path)
+    
+    assert data['layers'][0]['gate_proj']['stats']['min'] == math.inf
+    assert data['layers'][0]['gate_proj']['stats']['max'] == -math.inf
+
+
+def test_json_dumps_keeps_non_finite_values():
+    assert dashboard.json_dumps([math.inf, 1.0], finite=False) == '[Infinity,1.0]'
+
+
+def test_generate_dashboard_with_infinite_stats(tmp_path):
+    data_path = tmp_path / 'activations_data.json'
+    output_path = tmp_path / 'dashboard.html'
+    write_activation_data(data_path)
+    
+    dashboard.generate_dashboard_html(str(data_path), str(output_path))
+    
+    html = output_path.read_text(encoding='utf-8')
+    assert 'layer_0_down_proj_negative' in html
+    assert (tmp_path / dashboard.SERVICE_WORKER_FILENAME).exists()